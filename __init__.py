@@ -8,20 +8,57 @@
 # objetos. De esta forma `import utils` proporciona los nombres sin importar ninguno de
 # los back-ends.
 
-from .general import (
-    Archivo,
-    Carpeta,
-    Constantes,
-    Tiempo,
-    Validaciones,
-    setup_logging,
-)
+from typing import TYPE_CHECKING, Any
 
 __all__ = [
-    Archivo,
-    Carpeta,
-    Constantes,
-    Tiempo,
-    Validaciones,
-    setup_logging,
+    "Anexos",
+    "Archivo",
+    "Carpeta",
+    "Configuracion",
+    "Constantes",
+    "Espacios",
+    "Lote",
+    "Metricas",
+    "Tiempo",
+    "Validaciones",
+    "Vigilante",
+    "setup_logging",
 ]
+
+if TYPE_CHECKING:
+    from .general import (
+        Anexos,
+        Archivo,
+        Carpeta,
+        Configuracion,
+        Constantes,
+        Espacios,
+        Lote,
+        Metricas,
+        Tiempo,
+        Validaciones,
+        Vigilante,
+        setup_logging,
+    )
+
+
+def __getattr__(nombre: str) -> Any:
+    """Delega en el paquete general, que importa el módulo solo cuando se solicita
+
+    Args:
+        nombre (str): Nombre público solicitado
+
+    Returns:
+        Any: Objeto público del paquete
+    """
+    if nombre not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    from . import general
+
+    valor = getattr(general, nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,4 @@
+# Copyright 2025 Enzo Cisneros Collazos. All rights reserved.
+
+# Benchmarks del paquete utils. Cada módulo se ejecuta desde la ruta principal del
+# proyecto back-end, por ejemplo: `python -m utils.benchmarks.importacion`
@@ -0,0 +1,169 @@
+"""Prueba de carga de Archivo.actualizar_csv y actualizar_txt con varios procesos que
+agregan filas al mismo archivo a la vez. Mide filas por segundo según la cantidad de
+procesos y verifica al final que no se perdió ni se mezcló ninguna fila
+
+Uso:
+    python -m utils.benchmarks.anexos_concurrentes --procesos 1 2 4 8 --lotes 200
+    python -m utils.benchmarks.anexos_concurrentes --hilos 4 --buffer --formato txt
+    python -m utils.benchmarks.anexos_concurrentes --procesos 1 4 --formato csv.xz
+"""
+
+import argparse
+import csv
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.synchronize import Barrier
+
+from .. import Anexos, Archivo
+from ..general import compresion
+
+COLUMNAS = ["proceso", "lote", "fila", "carga"]
+# Relleno para que cada fila tenga un tamaño parecido al de un registro real
+CARGA = "x" * 80
+FORMATOS = ["csv", "csv.gz", "csv.bz2", "csv.xz", "txt"]
+
+
+def _es_csv(ruta: str) -> bool:
+    """Indica si la ruta es de un csv, comprimido o no"""
+    extension = compresion.extension_compresion(ruta)
+    if extension:
+        ruta = ruta[: -len(extension)]
+    return ruta.endswith(".csv")
+
+
+def _trabajador(
+    ruta: str,
+    proceso: int,
+    lotes: int,
+    filas: int,
+    hilos: int,
+    buffer: bool,
+    barrera: Barrier,
+) -> None:
+    """Agrega `lotes` lotes de `filas` filas repartidos entre `hilos` hilos"""
+    logging.getLogger().addHandler(logging.NullHandler())
+    if _es_csv(ruta):
+        # pandas se carga antes de la barrera para no medir su importación
+        import pandas  # noqa: F401
+    if buffer:
+        Anexos.activar()
+
+    def agregar(hilo: int) -> None:
+        for lote in range(hilo, lotes, hilos):
+            datos = [[proceso, lote, i, CARGA] for i in range(filas)]
+            if _es_csv(ruta):
+                Archivo.actualizar_csv(ruta, datos, COLUMNAS)
+            else:
+                texto = "".join(",".join(map(str, fila)) + "\n" for fila in datos)
+                Archivo.actualizar_txt(ruta, texto)
+
+    barrera.wait()
+    trabajadores = [threading.Thread(target=agregar, args=(h,)) for h in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    if buffer:
+        Anexos.activar(False)
+
+
+def verificar(ruta: str, procesos: int, lotes: int, filas: int) -> tuple[int, int]:
+    """Cuenta las filas del archivo y las que faltan, están repetidas o mal formadas
+
+    Args:
+        ruta (str): Archivo escrito por los procesos
+        procesos (int): Cantidad de procesos
+        lotes (int): Lotes por proceso
+        filas (int): Filas por lote
+
+    Returns:
+        tuple[int, int]: Filas leídas y filas con problemas
+    """
+    with compresion.abrir(ruta, "r", newline="") as f:
+        lector = csv.reader(f)
+        if _es_csv(ruta) and next(lector, None) != COLUMNAS:
+            return 0, procesos * lotes * filas
+        vistas, malas = set(), 0
+        for fila in lector:
+            if len(fila) != len(COLUMNAS) or fila[3] != CARGA:
+                malas += 1
+                continue
+            vistas.add((fila[0], fila[1], fila[2]))
+    leidas = len(vistas) + malas
+    esperadas = procesos * lotes * filas
+    return leidas, malas + (esperadas - len(vistas))
+
+
+def medir(
+    procesos: int,
+    lotes: int,
+    filas: int,
+    hilos: int,
+    buffer: bool,
+    ruta: str,
+) -> float:
+    """Lanza los procesos y mide el tiempo desde que todos empiezan a escribir
+
+    Returns:
+        float: Segundos hasta que terminó el último proceso
+    """
+    barrera = multiprocessing.Barrier(procesos + 1)
+    hijos = [
+        multiprocessing.Process(
+            target=_trabajador,
+            args=(ruta, p, lotes, filas, hilos, buffer, barrera),
+        )
+        for p in range(procesos)
+    ]
+    for hijo in hijos:
+        hijo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hijo in hijos:
+        hijo.join()
+    return time.perf_counter() - inicio
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--procesos", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--lotes", type=int, default=200, help="lotes por proceso")
+    parser.add_argument("--filas", type=int, default=20, help="filas por lote")
+    parser.add_argument("--hilos", type=int, default=1, help="hilos por proceso")
+    parser.add_argument("--buffer", action="store_true", help="activar Anexos")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--carpeta", default=None, help="carpeta para datos temporales")
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix="utils-anexos-", dir=args.carpeta)
+    base, error = None, False
+    try:
+        for procesos in args.procesos:
+            ruta = os.path.join(carpeta, f"anexos_{procesos}.{args.formato}")
+            segundos = medir(
+                procesos, args.lotes, args.filas, args.hilos, args.buffer, ruta
+            )
+            leidas, problemas = verificar(ruta, procesos, args.lotes, args.filas)
+            tasa = leidas / segundos
+            base = base or tasa
+            estado = "ok" if not problemas else f"{problemas} filas perdidas o rotas"
+            error = error or bool(problemas)
+            print(
+                f"procesos {procesos:>3}  filas {leidas:>9}  {segundos:>8.3f} s  "
+                f"{tasa:>12.1f} filas/s  x{tasa / base:>5.2f}  {estado}"
+            )
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return 1 if error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
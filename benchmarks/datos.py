@@ -0,0 +1,148 @@
+"""Generadores de datos sintéticos para los benchmarks: filas y archivos csv, texto,
+plantillas docx, árboles de carpetas y marcas de tiempo. Todos son deterministas para
+una misma semilla
+"""
+
+import csv
+import os
+import random
+from typing import Any
+
+# Columnas de las filas sintéticas, imitan un registro de expedientes
+COLUMNAS = ["expediente", "fecha", "monto", "estado", "descripcion"]
+ESTADOS = ["ingresado", "en tramite", "archivado", "resuelto"]
+
+
+def generar_expediente(aleatorio: random.Random) -> str:
+    """Devuelve un número de expediente con el formato que acepta Validaciones"""
+    return (
+        f"{aleatorio.randrange(100000):05d}-{aleatorio.randrange(2000, 2026)}-"
+        f"{aleatorio.randrange(10)}-{aleatorio.randrange(10000):04d}-JR-PE-"
+        f"{aleatorio.randrange(100):02d}"
+    )
+
+
+def generar_filas(n: int, semilla: int = 0) -> tuple[list[list[Any]], list[str]]:
+    """Genera `n` filas con las columnas de COLUMNAS
+
+    Args:
+        n (int): Cantidad de filas
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        tuple[list[list[Any]], list[str]]: Filas y nombres de columnas
+    """
+    aleatorio = random.Random(semilla)
+    filas = [
+        [
+            generar_expediente(aleatorio),
+            f"2025-{aleatorio.randrange(1, 13):02d}-{aleatorio.randrange(1, 29):02d}",
+            round(aleatorio.uniform(0, 100000), 2),
+            aleatorio.choice(ESTADOS),
+            f"registro sintético número {i}",
+        ]
+        for i in range(n)
+    ]
+    return filas, list(COLUMNAS)
+
+
+def generar_csv(ruta_csv: str, n: int, semilla: int = 0) -> str:
+    """Escribe un csv de `n` filas sin pasar por pandas
+
+    Args:
+        ruta_csv (str): Ruta del csv a crear
+        n (int): Cantidad de filas
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        str: Ruta del csv creado
+    """
+    filas, columnas = generar_filas(n, semilla)
+    with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(columnas)
+        escritor.writerows(filas)
+    return ruta_csv
+
+
+def generar_texto(n_lineas: int, semilla: int = 0) -> str:
+    """Genera un texto de `n_lineas` líneas
+
+    Args:
+        n_lineas (int): Cantidad de líneas
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        str: Texto generado
+    """
+    aleatorio = random.Random(semilla)
+    return "".join(
+        f"{i:09d} {generar_expediente(aleatorio)} {aleatorio.choice(ESTADOS)}\n"
+        for i in range(n_lineas)
+    )
+
+
+def generar_plantilla_docx(ruta_docx: str, n_campos: int) -> str:
+    """Crea una plantilla docx con `n_campos` variables p0, p1, ... como las que llena
+    Archivo.crear_docx
+
+    Args:
+        ruta_docx (str): Ruta de la plantilla a crear
+        n_campos (int): Cantidad de variables de la plantilla
+
+    Returns:
+        str: Ruta de la plantilla creada
+    """
+    # python-docx se instala con docxtpl
+    from docx import Document
+
+    documento = Document()
+    documento.add_heading("Plantilla sintética", level=1)
+    for i in range(n_campos):
+        documento.add_paragraph(f"Campo {i}: {{{{ p{i} }}}}")
+    documento.save(ruta_docx)
+    return ruta_docx
+
+
+def generar_arbol(
+    ruta_carpeta: str, n_archivos: int, por_carpeta: int = 1000
+) -> list[str]:
+    """Crea un árbol de carpetas con `n_archivos` archivos pequeños repartidos en
+    subcarpetas de `por_carpeta` archivos
+
+    Args:
+        ruta_carpeta (str): Carpeta raíz, se crea si no existe
+        n_archivos (int): Cantidad total de archivos
+        por_carpeta (int): Archivos por subcarpeta
+
+    Returns:
+        list[str]: Rutas de los archivos creados
+    """
+    rutas = []
+    for i in range(n_archivos):
+        subcarpeta = f"{ruta_carpeta}/d{i // por_carpeta:05d}"
+        if i % por_carpeta == 0:
+            os.makedirs(subcarpeta, exist_ok=True)
+        ruta = f"{subcarpeta}/f{i:08d}.txt"
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(f"{i}\n")
+        rutas.append(ruta)
+    return rutas
+
+
+def generar_marcas(n: int, semilla: int = 0) -> list[str]:
+    """Genera `n` marcas de tiempo en formato hh:mm:ss.sss
+
+    Args:
+        n (int): Cantidad de marcas
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        list[str]: Marcas de tiempo
+    """
+    aleatorio = random.Random(semilla)
+    return [
+        f"{aleatorio.randrange(24):02d}:{aleatorio.randrange(60):02d}:"
+        f"{aleatorio.randrange(60):02d}.{aleatorio.randrange(1000):03d}"
+        for _ in range(n)
+    ]
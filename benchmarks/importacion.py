@@ -0,0 +1,98 @@
+"""Mide el tiempo de `import utils` y del primer acceso a cada clase en un intérprete
+nuevo, y falla si alguno supera el límite o carga módulos pesados que deberían
+diferirse hasta que se usen
+
+Uso: `python -m utils.benchmarks.importacion --repeticiones 10 --limite-ms 50`
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Paquete utils y carpeta que lo contiene, desde donde se lanza el intérprete
+RUTA_PAQUETE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_PROYECTO = os.path.dirname(RUTA_PAQUETE)
+NOMBRE_PAQUETE = os.path.basename(RUTA_PAQUETE)
+
+# Módulos que no deben cargarse solo por importar el paquete o una de sus clases
+MODULOS_PROHIBIDOS = (
+    "pandas",
+    "docxtpl",
+    "numpy",
+    "asyncio",
+    "ctypes",
+    "sqlite3",
+    "concurrent.futures",
+)
+# Clases que se miden, cada una en un intérprete propio
+NOMBRES = ("Validaciones", "Archivo", "Carpeta", "Lote", "Espacios")
+
+# Se mide con time.perf_counter dentro del proceso hijo para no contar el arranque
+# del intérprete, que no depende del paquete
+CODIGO_HIJO = """
+import sys, time
+inicio = time.perf_counter()
+import {paquete}
+{paquete}.{nombre}
+fin = time.perf_counter()
+cargados = [m for m in {prohibidos!r} if m in sys.modules]
+print((fin - inicio) * 1000, ",".join(cargados))
+"""
+
+
+def medir(repeticiones: int, nombre: str) -> tuple[list[float], set[str]]:
+    """Importa el paquete y accede a `nombre` en `repeticiones` intérpretes nuevos
+
+    Args:
+        repeticiones (int): Cantidad de intérpretes a lanzar
+        nombre (str): Nombre público del paquete al que se accede
+
+    Returns:
+        tuple[list[float], set[str]]: Tiempos en ms y módulos prohibidos cargados
+    """
+    codigo = CODIGO_HIJO.format(
+        paquete=NOMBRE_PAQUETE, nombre=nombre, prohibidos=MODULOS_PROHIBIDOS
+    )
+    tiempos, cargados = [], set()
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=RUTA_PROYECTO,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        tiempos.append(float(salida[0]))
+        if len(salida) > 1:
+            cargados.update(salida[1].split(","))
+    return tiempos, cargados
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--limite-ms", type=float, default=50.0)
+    parser.add_argument("--nombres", nargs="+", default=list(NOMBRES))
+    args = parser.parse_args()
+
+    error = False
+    for nombre in args.nombres:
+        tiempos, cargados = medir(args.repeticiones, nombre)
+        mediana = statistics.median(tiempos)
+        print(
+            f"{NOMBRE_PAQUETE}.{nombre}: mediana {mediana:.2f} ms, "
+            f"mín {min(tiempos):.2f} ms, máx {max(tiempos):.2f} ms"
+        )
+        if cargados:
+            print(f"  Módulos pesados cargados al importar: {sorted(cargados)}")
+            error = True
+        if mediana > args.limite_ms:
+            print(f"  La mediana supera el límite de {args.limite_ms:.2f} ms")
+            error = True
+    return 1 if error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Medición de latencia, throughput y memoria pico, y comparación de resultados
+guardados en JSON contra una línea base
+"""
+
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from array import array
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from typing import Any
+
+
+def percentil(ordenados: array, p: float) -> float:
+    """Percentil `p` (0-100) por el método del rango más cercano
+
+    Args:
+        ordenados (array): Muestras ordenadas
+        p (float): Percentil a calcular
+
+    Returns:
+        float: Valor del percentil
+    """
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def medir_memoria(ejecutar: Callable[[], Any]) -> float:
+    """Ejecuta una vez y devuelve la memoria pico asignada en MB
+
+    Args:
+        ejecutar (Callable[[], Any]): Operación a medir
+
+    Returns:
+        float: Memoria pico en MB
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        ejecutar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 1e6
+
+
+def medir_llamada(funcion: Callable[[], tuple], muestras: array) -> int:
+    """Mide una llamada completa y agrega su latencia en ns a `muestras`
+
+    Args:
+        funcion (Callable[[], tuple]): Operación que devuelve (resultado, error)
+        muestras (array): Latencias acumuladas
+
+    Returns:
+        int: 1 si la operación devolvió error, 0 si no
+    """
+    inicio = time.perf_counter_ns()
+    _, error = funcion()
+    muestras.append(time.perf_counter_ns() - inicio)
+    return error is not None
+
+
+def medir_items(
+    funcion: Callable[[Any], tuple], items: Iterable[Any], muestras: array
+) -> int:
+    """Mide cada llamada `funcion(item)` y agrega sus latencias en ns a `muestras`
+
+    Args:
+        funcion (Callable[[Any], tuple]): Operación que devuelve (resultado, error)
+        items (Iterable[Any]): Argumento de cada llamada
+        muestras (array): Latencias acumuladas
+
+    Returns:
+        int: Cantidad de llamadas que devolvieron error
+    """
+    errores = 0
+    reloj = time.perf_counter_ns
+    agregar = muestras.append
+    for item in items:
+        inicio = reloj()
+        _, error = funcion(item)
+        agregar(reloj() - inicio)
+        errores += error is not None
+    return errores
+
+
+def resumir(muestras: array, unidades: int, memoria_mb: float, errores: int) -> dict:
+    """Resume las latencias medidas
+
+    Args:
+        muestras (array): Latencias en ns
+        unidades (int): Filas, archivos o items procesados en todas las muestras
+        memoria_mb (float): Memoria pico en MB
+        errores (int): Llamadas que devolvieron error
+
+    Returns:
+        dict: Métricas del caso
+    """
+    ordenados = array("q", sorted(muestras))
+    total_s = sum(ordenados) / 1e9
+    return {
+        "muestras": len(ordenados),
+        "p50_ms": percentil(ordenados, 50) / 1e6,
+        "p90_ms": percentil(ordenados, 90) / 1e6,
+        "p99_ms": percentil(ordenados, 99) / 1e6,
+        "max_ms": (ordenados[-1] if ordenados else 0) / 1e6,
+        "total_s": total_s,
+        "throughput_s": unidades / total_s if total_s else 0.0,
+        "memoria_pico_mb": memoria_mb,
+        "errores": errores,
+    }
+
+
+def guardar(resultados: dict, ruta_json: str) -> None:
+    """Guarda los resultados junto con datos del entorno
+
+    Args:
+        resultados (dict): Métricas por caso
+        ruta_json (str): Ruta del JSON a escribir
+    """
+    contenido = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "procesador": platform.processor(),
+        },
+        "resultados": resultados,
+    }
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        json.dump(contenido, f, indent=2, ensure_ascii=False)
+
+
+def cargar(ruta_json: str) -> dict:
+    """Carga los resultados de una corrida anterior
+
+    Args:
+        ruta_json (str): Ruta del JSON
+
+    Returns:
+        dict: Métricas por caso
+    """
+    with open(ruta_json, encoding="utf-8") as f:
+        return json.load(f)["resultados"]
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> list[str]:
+    """Compara contra la línea base y lista los casos que empeoraron más que `umbral`
+    en latencia p50 o en throughput
+
+    Args:
+        actual (dict): Métricas por caso de esta corrida
+        base (dict): Métricas por caso de la línea base
+        umbral (float): Fracción tolerada, por ejemplo 0.1 para 10 %
+
+    Returns:
+        list[str]: Descripción de cada regresión
+    """
+    regresiones = []
+    for caso, metricas in actual.items():
+        if caso not in base:
+            continue
+        anterior = base[caso]
+        if anterior["p50_ms"] and metricas["p50_ms"] > anterior["p50_ms"] * (
+            1 + umbral
+        ):
+            regresiones.append(
+                f"{caso}: p50 {anterior['p50_ms']:.4f} -> {metricas['p50_ms']:.4f} ms"
+            )
+        if anterior["throughput_s"] and metricas["throughput_s"] < anterior[
+            "throughput_s"
+        ] * (1 - umbral):
+            regresiones.append(
+                f"{caso}: throughput {anterior['throughput_s']:.1f} -> "
+                f"{metricas['throughput_s']:.1f} /s"
+            )
+    return regresiones
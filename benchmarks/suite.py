@@ -0,0 +1,401 @@
+"""Benchmark de las operaciones públicas de utils con datos sintéticos a varias escalas.
+Guarda latencias (p50, p90, p99), throughput y memoria pico en JSON, y puede comparar
+contra una corrida anterior para detectar regresiones
+
+Uso:
+    python -m utils.benchmarks.suite --tamanos 1e3 1e4 1e5 --salida actual.json
+    python -m utils.benchmarks.suite --casos "archivo.*" --base base.json --umbral 0.1
+"""
+
+import argparse
+import fnmatch
+import importlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from collections import namedtuple
+from collections.abc import Callable
+from typing import Any
+
+from .. import Archivo, Carpeta, Tiempo, Validaciones
+from . import datos, medicion
+
+# preparar(n, carpeta) -> (funcion, items, unidades). Si items es None se mide la
+# llamada completa funcion(); si no, se mide cada funcion(item). `muta` indica que la
+# operación altera sus datos y hay que prepararlos de nuevo en cada repetición
+Caso = namedtuple("Caso", ["nombre", "preparar", "tamano_max", "muta"])
+
+
+def _crear_csv(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    filas, columnas = datos.generar_filas(n)
+    ruta = f"{carpeta}/salida.csv"
+    return lambda: Archivo.crear_csv(ruta, filas, columnas), None, n
+
+
+def _actualizar_csv(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    # Se agrega un 1 % de filas nuevas, el caso típico de un reproceso
+    filas, columnas = datos.generar_filas(max(1, n // 100), semilla=1)
+    return lambda: Archivo.actualizar_csv(ruta, filas, columnas), None, len(filas)
+
+
+def _crear_csv_gz(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    filas, columnas = datos.generar_filas(n)
+    ruta = f"{carpeta}/salida.csv.gz"
+    return lambda: Archivo.crear_csv(ruta, filas, columnas), None, n
+
+
+def _actualizar_csv_comprimido(
+    n: int, carpeta: str, extension: str
+) -> tuple[Callable, Any, int]:
+    ruta = f"{carpeta}/base.csv{extension}"
+    Archivo.crear_csv(ruta, *datos.generar_filas(n))
+    filas, columnas = datos.generar_filas(max(1, n // 100), semilla=1)
+    return lambda: Archivo.actualizar_csv(ruta, filas, columnas), None, len(filas)
+
+
+def _actualizar_csv_gz(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    return _actualizar_csv_comprimido(n, carpeta, ".gz")
+
+
+def _actualizar_csv_bz2(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    return _actualizar_csv_comprimido(n, carpeta, ".bz2")
+
+
+def _actualizar_csv_xz(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    return _actualizar_csv_comprimido(n, carpeta, ".xz")
+
+
+def _leer_csv(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    return lambda: Archivo.leer_csv(ruta), None, n
+
+
+def _upsert_csv(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    filas, columnas = datos.generar_filas(n)
+    # El índice se construye fuera de la medición
+    Archivo.upsert_csv(ruta, [], columnas, ["expediente"])
+    # Se modifica un 1 % de filas existentes y se agrega otro 1 % de filas nuevas
+    cambios = [fila[:3] + ["resuelto"] + fila[4:] for fila in filas[::100]]
+    cambios += datos.generar_filas(max(1, n // 100), semilla=1)[0]
+    return (
+        lambda: Archivo.upsert_csv(ruta, cambios, columnas, ["expediente"]),
+        None,
+        len(cambios),
+    )
+
+
+def _buscar_csv(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    filas, columnas = datos.generar_filas(n)
+    Archivo.upsert_csv(ruta, [], columnas, ["expediente"])
+    claves = [[fila[0]] for fila in filas[:: max(1, n // 1000)]]
+    return lambda clave: Archivo.buscar_csv(ruta, clave), claves, len(claves)
+
+
+def _compactar_csv(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    filas, columnas = datos.generar_filas(n)
+    # Se reemplaza un 10 % de las filas para dejar lápidas que quitar
+    cambios = [fila[:3] + ["resuelto"] + fila[4:] for fila in filas[::10]]
+    Archivo.upsert_csv(ruta, cambios, columnas, ["expediente"])
+    return lambda: Archivo.compactar_csv(ruta), None, n
+
+
+def _cargar_csv_sqlite(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    ruta_bd = f"{carpeta}/base.db"
+    return lambda: Archivo.cargar_csv_sqlite(ruta, ruta_bd), None, n
+
+
+def _consultar_sqlite(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = datos.generar_csv(f"{carpeta}/base.csv", n)
+    ruta_bd = f"{carpeta}/base.db"
+    Archivo.cargar_csv_sqlite(ruta, ruta_bd, columnas_indice=["expediente"])
+    filas, _ = datos.generar_filas(n)
+    claves = [[fila[0]] for fila in filas[:: max(1, n // 1000)]]
+    consulta = "SELECT * FROM base WHERE expediente = ?"
+    return (
+        lambda clave: Archivo.consultar_sqlite(ruta_bd, consulta, clave),
+        claves,
+        len(claves),
+    )
+
+
+def _crear_txt(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    texto = datos.generar_texto(n)
+    ruta = f"{carpeta}/salida.txt"
+    return lambda: Archivo.crear_txt(ruta, texto), None, n
+
+
+def _actualizar_txt(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    lineas = datos.generar_texto(n).splitlines(keepends=True)
+    ruta = f"{carpeta}/salida.txt"
+    return lambda linea: Archivo.actualizar_txt(ruta, linea), lineas, n
+
+
+def _leer_txt(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = f"{carpeta}/base.txt"
+    Archivo.crear_txt(ruta, datos.generar_texto(n))
+    return lambda: Archivo.leer_txt(ruta), None, n
+
+
+def _crear_docx(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    plantilla = datos.generar_plantilla_docx(f"{carpeta}/plantilla.docx", n)
+    valores = [f"valor {i}" for i in range(n)]
+    ruta = f"{carpeta}/salida.docx"
+    return lambda: Archivo.crear_docx(ruta, plantilla, valores), None, n
+
+
+def _borrar_archivo(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = datos.generar_arbol(f"{carpeta}/arbol", n)
+    return Archivo.borrar_archivo, rutas, n
+
+
+def _crear_carpeta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = [f"{carpeta}/c{i // 1000:05d}/c{i:08d}" for i in range(n)]
+    return Carpeta.crear_carpeta, rutas, n
+
+
+def _borrar_carpeta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = f"{carpeta}/arbol"
+    datos.generar_arbol(ruta, n)
+    return lambda: Carpeta.borrar_carpeta(ruta), None, n
+
+
+def _listar_archivos(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    ruta = f"{carpeta}/arbol"
+    datos.generar_arbol(ruta, n)
+    return lambda: Carpeta.listar_archivos(ruta, [".txt"]), None, n
+
+
+def _vigilar_carpeta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    # Se mide empezar a vigilar, que recorre el árbol, y cerrar el vigilante
+    ruta = f"{carpeta}/arbol"
+    datos.generar_arbol(ruta, n)
+
+    def vigilar() -> tuple[Any, str]:
+        vigilante, msj = Carpeta.vigilar_carpeta(ruta)
+        if msj is not None:
+            return None, msj
+        vigilante.cerrar()
+        return vigilante, None
+
+    return vigilar, None, n
+
+
+def _comprimir_carpeta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    # n filas repartidas en 10 csv, como una carpeta de reportes para descargar
+    ruta = f"{carpeta}/reportes"
+    os.makedirs(ruta)
+    for i in range(10):
+        datos.generar_csv(f"{ruta}/reporte_{i}.csv", max(1, n // 10))
+
+    def comprimir() -> tuple[int, str]:
+        generador, msj = Carpeta.comprimir_carpeta(ruta)
+        if msj is not None:
+            return None, msj
+        return sum(len(trozo) for trozo in generador), None
+
+    return comprimir, None, n
+
+
+def _marca_a_ms(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    return Tiempo.marca_a_ms, datos.generar_marcas(n), n
+
+
+def _calcular_intervalo(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    pares = list(zip(datos.generar_marcas(n), datos.generar_marcas(n, semilla=1)))
+    return lambda par: Tiempo.calcular_intervalo(*par), pares, n
+
+
+def _es_tipo(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    # Columnas de texto, sin el monto
+    filas = datos.generar_filas(n)[0]
+    valores = [fila[(0, 1, 3, 4)[i % 4]] for i, fila in enumerate(filas)]
+    return lambda valor: Validaciones.es_tipo(valor, str), valores, n
+
+
+def _es_tipos(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    valores = [fila[i % 5] for i, fila in enumerate(datos.generar_filas(n)[0])]
+    return lambda valor: Validaciones.es_tipos(valor, (str, float)), valores, n
+
+
+def _es_len_correcto(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    filas, columnas = datos.generar_filas(n)
+    return lambda fila: Validaciones.es_len_correcto(fila, len(columnas)), filas, n
+
+
+def _es_formato_expediente(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    expedientes = [fila[0] for fila in datos.generar_filas(n)[0]]
+    return Validaciones.es_formato_expediente, expedientes, n
+
+
+def _es_ruta_absoluta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = [f"{carpeta}/f{i:08d}.csv" for i in range(n)]
+    return Validaciones.es_ruta_absoluta, rutas, n
+
+
+def _es_tipo_archivo(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = [f"{carpeta}/f{i:08d}.csv" for i in range(n)]
+    return lambda ruta: Validaciones.es_tipo_archivo(ruta, ".csv"), rutas, n
+
+
+def _es_tipos_archivos(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = [f"{carpeta}/f{i:08d}.{('csv', 'txt', 'docx')[i % 3]}" for i in range(n)]
+    tipos = [".docx", ".txt", ".csv"]
+    return lambda ruta: Validaciones.es_tipos_archivos(ruta, tipos), rutas, n
+
+
+def _existe_archivo(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = datos.generar_arbol(f"{carpeta}/arbol", n)
+    return Validaciones.existe_archivo, rutas, n
+
+
+def _existe_ruta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = datos.generar_arbol(f"{carpeta}/arbol", n)
+    return Validaciones.existe_ruta, rutas, n
+
+
+def _existe_carpeta(n: int, carpeta: str) -> tuple[Callable, Any, int]:
+    rutas = {os.path.dirname(ruta) for ruta in datos.generar_arbol(carpeta, n, 10)}
+    return Validaciones.existe_carpeta, sorted(rutas), len(rutas)
+
+
+CASOS = [
+    Caso("archivo.crear_csv", _crear_csv, 10**7, False),
+    Caso("archivo.actualizar_csv", _actualizar_csv, 10**7, True),
+    Caso("archivo.crear_csv_gz", _crear_csv_gz, 10**7, False),
+    Caso("archivo.actualizar_csv_gz", _actualizar_csv_gz, 10**7, True),
+    Caso("archivo.actualizar_csv_bz2", _actualizar_csv_bz2, 10**6, True),
+    Caso("archivo.actualizar_csv_xz", _actualizar_csv_xz, 10**6, True),
+    Caso("archivo.leer_csv", _leer_csv, 10**7, False),
+    Caso("archivo.upsert_csv", _upsert_csv, 10**7, True),
+    Caso("archivo.buscar_csv", _buscar_csv, 10**7, False),
+    Caso("archivo.compactar_csv", _compactar_csv, 10**7, True),
+    Caso("archivo.cargar_csv_sqlite", _cargar_csv_sqlite, 10**7, True),
+    Caso("archivo.consultar_sqlite", _consultar_sqlite, 10**7, False),
+    Caso("archivo.crear_txt", _crear_txt, 10**7, False),
+    Caso("archivo.actualizar_txt", _actualizar_txt, 10**7, True),
+    Caso("archivo.leer_txt", _leer_txt, 10**7, False),
+    Caso("archivo.crear_docx", _crear_docx, 10**5, False),
+    Caso("archivo.borrar_archivo", _borrar_archivo, 10**7, True),
+    Caso("carpeta.crear_carpeta", _crear_carpeta, 10**7, True),
+    Caso("carpeta.borrar_carpeta", _borrar_carpeta, 10**7, True),
+    Caso("carpeta.listar_archivos", _listar_archivos, 10**7, False),
+    Caso("carpeta.vigilar_carpeta", _vigilar_carpeta, 10**6, False),
+    Caso("carpeta.comprimir_carpeta", _comprimir_carpeta, 10**7, False),
+    Caso("tiempo.marca_a_ms", _marca_a_ms, 10**7, False),
+    Caso("tiempo.calcular_intervalo", _calcular_intervalo, 10**7, False),
+    Caso("validaciones.es_tipo", _es_tipo, 10**7, False),
+    Caso("validaciones.es_tipos", _es_tipos, 10**7, False),
+    Caso("validaciones.es_len_correcto", _es_len_correcto, 10**7, False),
+    Caso("validaciones.es_formato_expediente", _es_formato_expediente, 10**7, False),
+    Caso("validaciones.es_ruta_absoluta", _es_ruta_absoluta, 10**7, False),
+    Caso("validaciones.es_tipo_archivo", _es_tipo_archivo, 10**7, False),
+    Caso("validaciones.es_tipos_archivos", _es_tipos_archivos, 10**7, False),
+    Caso("validaciones.existe_archivo", _existe_archivo, 10**7, False),
+    Caso("validaciones.existe_ruta", _existe_ruta, 10**7, False),
+    Caso("validaciones.existe_carpeta", _existe_carpeta, 10**7, False),
+]
+
+
+def ejecutar_caso(caso: Caso, n: int, repeticiones: int, carpeta_base: str) -> dict:
+    """Mide un caso a una escala. La primera pasada solo mide memoria pico, las
+    siguientes miden latencia
+
+    Args:
+        caso (Caso): Caso a medir
+        n (int): Cantidad de filas, archivos o items
+        repeticiones (int): Pasadas cronometradas
+        carpeta_base (str): Carpeta temporal para los datos generados
+
+    Returns:
+        dict: Métricas del caso
+    """
+    muestras, unidades, errores, memoria = array("q"), 0, 0, 0.0
+    preparado = None
+    for pasada in range(repeticiones + 1):
+        if preparado is None or caso.muta:
+            carpeta = tempfile.mkdtemp(dir=carpeta_base)
+            preparado = caso.preparar(n, carpeta)
+        funcion, items, cantidad = preparado
+        if items is None:
+            medir = lambda m: medicion.medir_llamada(funcion, m)  # noqa: E731
+        else:
+            medir = lambda m: medicion.medir_items(funcion, items, m)  # noqa: E731
+        if pasada == 0:
+            memoria = medicion.medir_memoria(lambda: medir(array("q")))
+        else:
+            errores += medir(muestras)
+            unidades += cantidad
+        if caso.muta or pasada == repeticiones:
+            shutil.rmtree(carpeta, ignore_errors=True)
+    return medicion.resumir(muestras, unidades, memoria, errores)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--tamanos", nargs="+", type=float, default=[1e3, 1e4, 1e5], metavar="N"
+    )
+    parser.add_argument("--casos", nargs="+", default=["*"], metavar="PATRON")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--carpeta", default=None, help="carpeta para datos temporales")
+    parser.add_argument("--salida", default=None, help="JSON de resultados")
+    parser.add_argument("--base", default=None, help="JSON de la línea base")
+    parser.add_argument("--umbral", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Los mensajes de log de las validaciones se generan pero no se imprimen
+    logging.getLogger().addHandler(logging.NullHandler())
+    # Las dependencias pesadas se importan antes para que su carga no cuente en la
+    # memoria pico del primer caso que las use
+    for modulo in ("pandas", "docxtpl"):
+        importlib.import_module(modulo)
+
+    casos = [c for c in CASOS if any(fnmatch.fnmatch(c.nombre, p) for p in args.casos)]
+    carpeta_base = tempfile.mkdtemp(prefix="utils-bench-", dir=args.carpeta)
+    resultados = {}
+    try:
+        for caso in casos:
+            for n in sorted(int(t) for t in args.tamanos):
+                if n > caso.tamano_max:
+                    continue
+                clave = f"{caso.nombre}[{n}]"
+                metricas = ejecutar_caso(caso, n, args.repeticiones, carpeta_base)
+                resultados[clave] = metricas
+                print(
+                    f"{clave:<45} p50 {metricas['p50_ms']:>10.4f} ms  "
+                    f"p99 {metricas['p99_ms']:>10.4f} ms  "
+                    f"{metricas['throughput_s']:>14.1f} /s  "
+                    f"{metricas['memoria_pico_mb']:>9.2f} MB"
+                    + (
+                        f"  errores {metricas['errores']}"
+                        if metricas["errores"]
+                        else ""
+                    )
+                )
+    finally:
+        shutil.rmtree(carpeta_base, ignore_errors=True)
+
+    if args.salida:
+        medicion.guardar(resultados, os.path.abspath(args.salida))
+    if args.base:
+        regresiones = medicion.comparar(
+            resultados, medicion.cargar(args.base), args.umbral
+        )
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,18 +8,59 @@
 # objetos. De esta forma `import utils` proporciona los nombres sin importar ninguno de
 # los back-ends.
 
-from .archivo import Archivo
-from .carpeta import Carpeta
-from .constantes import Constantes
-from .log import setup_logging
-from .tiempo import Tiempo
-from .validaciones import Validaciones
-
-__all__ = [
-    Archivo,
-    Carpeta,
-    Constantes,
-    setup_logging,
-    Tiempo,
-    Validaciones,
-]
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# Nombre público -> módulo del paquete que lo define
+_importaciones = {
+    "Anexos": "anexos",
+    "Archivo": "archivo",
+    "Carpeta": "carpeta",
+    "Configuracion": "configuracion",
+    "Constantes": "constantes",
+    "Espacios": "espacios",
+    "Lote": "lote",
+    "setup_logging": "log",
+    "Metricas": "metricas",
+    "Tiempo": "tiempo",
+    "Validaciones": "validaciones",
+    "Vigilante": "vigilante",
+}
+
+__all__ = list(_importaciones)
+
+if TYPE_CHECKING:
+    from .anexos import Anexos
+    from .archivo import Archivo
+    from .carpeta import Carpeta
+    from .configuracion import Configuracion
+    from .constantes import Constantes
+    from .espacios import Espacios
+    from .log import setup_logging
+    from .lote import Lote
+    from .metricas import Metricas
+    from .tiempo import Tiempo
+    from .validaciones import Validaciones
+    from .vigilante import Vigilante
+
+
+def __getattr__(nombre: str) -> Any:
+    """Importa el módulo que define `nombre` la primera vez que se solicita
+
+    Args:
+        nombre (str): Nombre público solicitado
+
+    Returns:
+        Any: Objeto público del paquete
+    """
+    if nombre not in _importaciones:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    modulo = importlib.import_module(f".{_importaciones[nombre]}", __name__)
+    valor = getattr(modulo, nombre)
+    # Se guarda en el namespace para que los siguientes accesos no pasen por aquí
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,247 @@
+import atexit
+import contextlib
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterator
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:
+    # En Windows no hay candados de fcntl y solo se sincronizan los hilos del proceso
+    fcntl = None
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Un candado de hilos por ruta; fcntl sincroniza además los procesos
+_candados: dict[str, threading.Lock] = {}
+_candado_global = threading.Lock()
+# Datos encolados por (ruta, grupo) -> [función que los escribe, lista de datos]
+_pendientes: dict[tuple[str, Any], list] = {}
+_cantidad = 0
+_candado_buffer = threading.Lock()
+# Evita que dos vaciados escriban lotes de la misma ruta fuera de orden
+_candado_vaciado = threading.Lock()
+_activo = False
+_detener = threading.Event()
+_hilo: threading.Thread = None
+
+
+def candado(ruta: str) -> threading.Lock:
+    """Devuelve el candado de hilos asociado a una ruta"""
+    with _candado_global:
+        return _candados.setdefault(ruta, threading.Lock())
+
+
+@contextlib.contextmanager
+def bloquear(ruta: str, crear: bool = True, compartido: bool = False) -> Iterator[int]:
+    """Toma el candado exclusivo de un archivo entre los hilos del proceso y, donde hay
+    fcntl, entre procesos. Entrega un descriptor abierto en O_APPEND, así cada
+    os.write cae al final aunque otro proceso haya escrito antes. Si mientras se
+    esperaba otro proceso reemplazó el archivo con os.replace, se abre el nuevo. Con
+    'compartido' toma un candado de lectura, que varios lectores pueden tener a la vez
+    y solo espera a quienes escriben
+
+    Args:
+        ruta (str): Ruta del archivo
+        crear (bool): Crear el archivo vacío si no existe; no aplica a 'compartido'
+        compartido (bool): Abrir solo para leer con un candado compartido
+
+    Yields:
+        int: Descriptor del archivo, se cierra y libera el candado al salir
+    """
+    if compartido:
+        banderas, modo, crear = os.O_RDONLY, getattr(fcntl, "LOCK_SH", 0), False
+    else:
+        banderas, modo = os.O_RDWR | os.O_APPEND, getattr(fcntl, "LOCK_EX", 0)
+    banderas |= getattr(os, "O_BINARY", 0)
+    if crear:
+        banderas |= os.O_CREAT
+    # Los candados de fcntl de descriptores distintos se excluyen también dentro del
+    # proceso, así que los lectores no necesitan el candado de hilos
+    hilos = contextlib.nullcontext()
+    if not compartido or fcntl is None:
+        hilos = candado(ruta)
+    with hilos:
+        while True:
+            fd = os.open(ruta, banderas, 0o666)
+            if fcntl is None:
+                break
+            try:
+                fcntl.flock(fd, modo)
+                actual = os.stat(ruta)
+            except FileNotFoundError:
+                # Lo borraron mientras se esperaba el candado
+                os.close(fd)
+                if not crear:
+                    raise
+                continue
+            except BaseException:
+                os.close(fd)
+                raise
+            propio = os.fstat(fd)
+            if (propio.st_ino, propio.st_dev) == (actual.st_ino, actual.st_dev):
+                break
+            os.close(fd)
+        try:
+            yield fd
+        finally:
+            # Cerrar el descriptor libera el candado de fcntl
+            os.close(fd)
+
+
+def escribir(fd: int, datos: bytes) -> None:
+    """Escribe todos los bytes en el descriptor, repitiendo las escrituras parciales"""
+    vista = memoryview(datos)
+    while vista:
+        vista = vista[os.write(fd, vista) :]
+
+
+def _ciclo() -> None:
+    while not _detener.wait(Anexos.intervalo):
+        Anexos.vaciar()
+
+
+def _iniciar_hilo() -> None:
+    global _hilo
+    _detener.clear()
+    _hilo = threading.Thread(target=_ciclo, name="utils-anexos", daemon=True)
+    _hilo.start()
+
+
+def _reiniciar_en_hijo() -> None:
+    """Tras un fork los candados pueden haber quedado tomados por hilos que no existen
+    en el hijo, y lo encolado pertenece al padre, que lo escribirá. El buffer queda
+    inactivo en el hijo: los procesos de un pool terminan sin pasar por atexit y lo
+    que encolaran se perdería
+    """
+    global _candado_global, _candado_buffer, _candado_vaciado, _cantidad, _detener
+    global _activo, _hilo
+    _candado_global = threading.Lock()
+    _candado_buffer = threading.Lock()
+    _candado_vaciado = threading.Lock()
+    _detener = threading.Event()
+    _candados.clear()
+    _pendientes.clear()
+    _cantidad = 0
+    _activo = False
+    _hilo = None
+
+
+def _al_salir() -> None:
+    if _pendientes:
+        Anexos.vaciar()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_en_hijo)
+atexit.register(_al_salir)
+
+
+class Anexos:
+    """Una clase que contiene métodos para agrupar en un buffer del proceso las filas y
+    textos que varios hilos agregan a un mismo archivo, y escribirlos juntos con una
+    sola toma del candado por archivo. Mientras está activo, Archivo.actualizar_csv y
+    Archivo.actualizar_txt encolan en vez de escribir y devuelven sin esperar al disco
+    """
+
+    # Segundos entre vaciados del hilo de fondo
+    intervalo = 0.05
+    # Llamadas encoladas desde las que quien encola vacía el buffer sin esperar al hilo
+    max_pendientes = 10000
+
+    @staticmethod
+    def activar(
+        activo: bool = True, intervalo: float = None, max_pendientes: int = None
+    ) -> None:
+        """Activa o desactiva el buffer. Al desactivarlo se escribe lo pendiente. Lo
+        encolado también se escribe al terminar el intérprete, salvo que el proceso
+        muera por una señal
+
+        Args:
+            activo (bool): Nuevo estado
+            intervalo (float): Segundos entre vaciados; None para no cambiarlo
+            max_pendientes (int): Llamadas encoladas máximas; None para no cambiarlo
+        """
+        global _activo
+        if intervalo is not None:
+            Anexos.intervalo = intervalo
+        if max_pendientes is not None:
+            Anexos.max_pendientes = max_pendientes
+        if activo == _activo:
+            return
+        _activo = activo
+        if activo:
+            _iniciar_hilo()
+        else:
+            _detener.set()
+            _hilo.join()
+            Anexos.vaciar()
+
+    @staticmethod
+    def esta_activo() -> bool:
+        """Indica si las actualizaciones se están encolando
+
+        Returns:
+            bool: Estado actual
+        """
+        return _activo
+
+    @staticmethod
+    def encolar(
+        ruta: str,
+        grupo: Any,
+        dato: Any,
+        funcion: Callable[[str, Any, list[Any]], tuple[str, str]],
+    ) -> None:
+        """Encola un dato para agregarlo a un archivo. Al vaciar se llama una vez
+        funcion(ruta, grupo, datos) con todos los datos encolados para esa ruta y
+        grupo, en orden de llegada
+
+        Args:
+            ruta (str): Ruta del archivo
+            grupo (Any): Agrupa los datos que se pueden escribir juntos, por ejemplo
+                las columnas de un csv
+            dato (Any): Dato a agregar
+            funcion (Callable[[str, Any, list[Any]], tuple[str, str]]): Escribe los
+                datos y devuelve la ruta y un mensaje de error
+        """
+        global _cantidad
+        with _candado_buffer:
+            _pendientes.setdefault((ruta, grupo), [funcion, []])[1].append(dato)
+            _cantidad += 1
+            lleno = _cantidad >= Anexos.max_pendientes
+        if lleno:
+            Anexos.vaciar()
+
+    @staticmethod
+    def vaciar() -> tuple[int, str]:
+        """Escribe ahora todo lo encolado
+
+        Returns:
+            tuple[int, str]: Cantidad de datos escritos y mensaje de error
+        """
+        global _cantidad
+        escritos, error = 0, None
+        with _candado_vaciado:
+            with _candado_buffer:
+                lote = dict(_pendientes)
+                _pendientes.clear()
+                _cantidad = 0
+            for (ruta, grupo), (funcion, datos) in lote.items():
+                try:
+                    _, msj = funcion(ruta, grupo, datos)
+                except Exception as e:
+                    mensaje = f"Error al vaciar en {ruta}, problema imprevisto: {e}"
+                    logger.exception(mensaje)
+                    msj = "Error anexos"
+                if msj is None:
+                    escritos += len(datos)
+                else:
+                    mensaje = f"Se perdieron {len(datos)} datos encolados para {ruta}"
+                    logger.error(mensaje)
+                    error = "Error anexos"
+        return escritos, error
@@ -1,27 +1,144 @@
+import contextlib
+import csv
 import logging
 import os
-from typing import Any
-
-import pandas as pd
-from docxtpl import DocxTemplate
+import pathlib
+from typing import IO, Any
 
+from . import compresion
+from .anexos import Anexos, bloquear, escribir
 from .constantes import Constantes
-from .log import setup_logging
+from .indice_csv import IndiceCsv, normalizar, serializar
+from .metricas import Metricas
 from .validaciones import Validaciones
 
-# Configura el logging
-setup_logging()
 # Obtiene un logger para este módulo
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
 
 
+def _abrir(ruta: str, modo: str, newline: str = None) -> IO:
+    """Abre un csv o txt, comprimido o no, con la codificación del proyecto"""
+    return compresion.abrir(
+        ruta,
+        modo,
+        Archivo.nivel_compresion,
+        encoding=Constantes.encoding.value,
+        newline=newline,
+    )
+
+
+def _anexar_csv(
+    ruta_csv: str, columnas: tuple[str, ...], lotes: list[list[list[Any]]]
+) -> tuple[str, str]:
+    """Agrega lotes de filas al csv tomando su candado una sola vez. Si el csv está
+    vacío escribe también la cabecera y si 'columnas' trae columnas nuevas lo
+    reemplaza completo
+    """
+    # pandas se importa recién aquí para no cargarlo al importar el paquete
+    import pandas as pd
+
+    columnas = list(columnas)
+    filas = [fila for lote in lotes for fila in lote]
+    try:
+        with bloquear(ruta_csv) as fd:
+            # Se lee solo la cabecera del csv. Un archivo vacío, por ejemplo recién
+            # creado por bloquear, no se abre: bz2 y lzma fallan al leerlo
+            with Metricas.fase("archivo.actualizar_csv.disco"):
+                cabecera = []
+                if os.fstat(fd).st_size:
+                    with _abrir(ruta_csv, "r", newline="") as f:
+                        cabecera = next(csv.reader(f), [])
+            # Validar que las columnas del csv estén incluidas en las nuevas columnas
+            if set(cabecera).issubset(set(columnas)):
+                mensaje = f"Las columnas del csv se incluyen en: {columnas}"
+                logger.info(mensaje)
+            else:
+                mensaje = f"Las columnas del csv no se incluyen en: {columnas}"
+                logger.error(mensaje)
+                return None, "Error archivo"
+            with Metricas.fase("archivo.actualizar_csv.pandas"):
+                # Se crea un df_aux a partir de la información de entrada
+                df_aux = pd.DataFrame(filas, columns=columnas)
+            if not cabecera or sorted(cabecera) == sorted(columnas):
+                # Mismas columnas: se agregan las filas en el orden del csv con una
+                # sola escritura, en un csv comprimido como un miembro nuevo
+                with Metricas.fase("archivo.actualizar_csv.pandas"):
+                    if cabecera:
+                        texto = df_aux[cabecera].to_csv(index=False, header=False)
+                    else:
+                        texto = df_aux.to_csv(index=False)
+                    datos = compresion.comprimir(
+                        ruta_csv,
+                        texto.encode(Constantes.encoding.value),
+                        Archivo.nivel_compresion,
+                    )
+                with Metricas.fase("archivo.actualizar_csv.disco"):
+                    if texto:
+                        escribir(fd, datos)
+                escritos = len(datos)
+            else:
+                # Columnas nuevas: se carga el csv completo y se reemplaza
+                with Metricas.fase("archivo.actualizar_csv.disco"):
+                    with _abrir(ruta_csv, "r", newline="") as f:
+                        df = pd.read_csv(f)
+                with Metricas.fase("archivo.actualizar_csv.pandas"):
+                    # Se concatenan las nuevas filas
+                    df = pd.concat([df, df_aux])
+                # El temporal conserva la extensión para comprimirse igual
+                carpeta, nombre = os.path.split(ruta_csv)
+                temporal = os.path.join(carpeta, f".{os.getpid()}.tmp.{nombre}")
+                with Metricas.fase("archivo.actualizar_csv.disco"):
+                    with _abrir(temporal, "w", newline="") as f:
+                        df.to_csv(f, index=False)
+                    os.replace(temporal, ruta_csv)
+                escritos = os.path.getsize(ruta_csv)
+        if Metricas.esta_activo():
+            Metricas.sumar_bytes("archivo.actualizar_csv", escritos=escritos)
+        return ruta_csv, None
+    except Exception as e:
+        mensaje = f"Error al operar con los df, problema imprevisto: {e}"
+        logger.exception(mensaje)
+        return None, "Error archivo"
+
+
+def _anexar_txt(ruta_txt: str, grupo: Any, textos: list[str]) -> tuple[str, str]:
+    """Agrega textos al final del archivo con una sola escritura"""
+    texto = "".join(textos)
+    # Igual que open en modo texto, se usa el salto de línea del sistema
+    if os.linesep != "\n":
+        texto = texto.replace("\n", os.linesep)
+    try:
+        datos = compresion.comprimir(
+            ruta_txt, texto.encode(Constantes.encoding.value), Archivo.nivel_compresion
+        )
+        with bloquear(ruta_txt) as fd:
+            with Metricas.fase("archivo.actualizar_txt.disco"):
+                escribir(fd, datos)
+        if Metricas.esta_activo():
+            Metricas.sumar_bytes("archivo.actualizar_txt", escritos=len(datos))
+        return ruta_txt, None
+    except Exception as e:
+        mensaje = f"Error al escribir en {ruta_txt}, problema imprevisto: {e}"
+        logger.exception(mensaje)
+        return None, "Error archivo"
+
+
 class Archivo:
     """Una clase que contiene métodos para crear y actualizar archivo csv y txt, crear
-    archivos docx, y borrar archivos en general
+    archivos docx, y borrar archivos en general. Los csv y txt pueden estar comprimidos
+    con gzip, bz2 o xz según su extensión, por ejemplo '.csv.gz'. Los csv se pueden
+    cargar en una base SQLite para consultarlos sin volver a leerlos
     """
 
+    # Nivel de compresión al escribir csv y txt comprimidos, de 0 (rápido) a 9 (más
+    # pequeño)
+    nivel_compresion = 6
+    # Bytes del csv que se leen e insertan con cada executemany al cargar en SQLite
+    tamano_bloque_sqlite = 4 << 20
+
     @staticmethod
+    @Metricas.instrumentar("archivo.borrar_archivo")
     def borrar_archivo(ruta_archivo: str, credenciales: dict = {}) -> tuple[str, str]:
         """Elimina el archivo
 
@@ -42,7 +159,8 @@ class Archivo:
             return ruta_archivo, msj
         # Intentar borrar el archivo
         try:
-            os.remove(ruta_archivo)
+            with Metricas.fase("archivo.borrar_archivo.disco"):
+                os.remove(ruta_archivo)
             mensaje = f"Archivo eliminado: {ruta_archivo}"
             logger.info(mensaje)
             return ruta_archivo, None
@@ -56,6 +174,7 @@ class Archivo:
             return None, "Error archivo"
 
     @staticmethod
+    @Metricas.instrumentar("archivo.crear_csv")
     def crear_csv(
         ruta_csv: str,
         filas: list[list[Any]],
@@ -77,45 +196,57 @@ class Archivo:
         res, msj = Validaciones.es_ruta_absoluta(ruta_csv, credenciales)
         if not res:
             return None, msj
-        # Validar que 'ruta_csv' sea del tipo csv
-        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales)
+        # Validar que 'ruta_csv' sea del tipo csv, comprimido o no
+        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales, True)
         if not res:
             return None, msj
         # Validar que la carpeta donde estará 'ruta_csv' exista
         res, msj = Validaciones.existe_carpeta(os.path.dirname(ruta_csv), credenciales)
         if not res:
             return None, msj
-        # Validar que 'filas' sea del tipo list
-        res, msj = Validaciones.es_tipo(filas, list, credenciales)
-        if not res:
-            return None, msj
-        # Validar que 'columnas' sea del tipo list
-        res, msj = Validaciones.es_tipo(columnas, list, credenciales)
-        if not res:
-            return None, msj
-        len_values = -1
-        for lista in filas:
-            # Validar que cada componente sea una lista y tenga la misma longitud
-            res, msj = Validaciones.es_tipo(lista, list, credenciales)
+        with Metricas.fase("archivo.crear_csv.validacion"):
+            # Validar que 'filas' sea del tipo list
+            res, msj = Validaciones.es_tipo(filas, list, credenciales)
             if not res:
                 return None, msj
-            if len_values == -1:
-                len_values = len(lista)
-            else:
-                # Validar que cada componente tenga el mismo len
-                res, msj = Validaciones.es_len_correcto(lista, len_values, credenciales)
+            # Validar que 'columnas' sea del tipo list
+            res, msj = Validaciones.es_tipo(columnas, list, credenciales)
+            if not res:
+                return None, msj
+            len_values = -1
+            for lista in filas:
+                # Validar que cada componente sea una lista y tenga la misma longitud
+                res, msj = Validaciones.es_tipo(lista, list, credenciales)
                 if not res:
                     return None, msj
-        # Validar que 'columnas' tenga el mismo len que cada lista de filas
-        res, msj = Validaciones.es_len_correcto(columnas, len_values)
-        if not res:
-            return None, msj
+                if len_values == -1:
+                    len_values = len(lista)
+                else:
+                    # Validar que cada componente tenga el mismo len
+                    res, msj = Validaciones.es_len_correcto(
+                        lista, len_values, credenciales
+                    )
+                    if not res:
+                        return None, msj
+            # Validar que 'columnas' tenga el mismo len que cada lista de filas
+            res, msj = Validaciones.es_len_correcto(columnas, len_values)
+            if not res:
+                return None, msj
+        # pandas se importa recién aquí para no cargarlo al importar el paquete
+        import pandas as pd
+
         # Intenta crear el csv
         try:
             # Se crea un df a partir de la información de entrada
-            df = pd.DataFrame(filas, columnas)
+            with Metricas.fase("archivo.crear_csv.pandas"):
+                df = pd.DataFrame(filas, columns=columnas)
             # Se guarda el csv en la ruta definida
-            df.to_csv(ruta_csv, index=False, encoding=Constantes.encoding.value)
+            with Metricas.fase("archivo.crear_csv.disco"):
+                with _abrir(ruta_csv, "w", newline="") as f:
+                    df.to_csv(f, index=False)
+            if Metricas.esta_activo():
+                escritos = os.path.getsize(ruta_csv)
+                Metricas.sumar_bytes("archivo.crear_csv", escritos=escritos)
             return ruta_csv, None
         except Exception as e:
             mensaje = f"Error al operar con el df, problema imprevisto: {e}"
@@ -123,13 +254,20 @@ class Archivo:
             return None, "Error archivo"
 
     @staticmethod
+    @Metricas.instrumentar("archivo.actualizar_csv")
     def actualizar_csv(
         ruta_csv: str,
         filas: list[list[Any]],
         columnas: list[Any],
         credenciales: dict = {},
     ) -> tuple[str, str]:
-        """Actualiza el archivo csv en la ruta indicada
+        """Actualiza el archivo csv en la ruta indicada, o lo crea si no existe. Si
+        'columnas' tiene las mismas columnas que el csv, las filas se agregan al final
+        sin leer el resto del archivo; en un csv comprimido se agregan como un miembro
+        nuevo. Si 'columnas' agrega columnas nuevas, el csv se reescribe completo. Es
+        seguro llamarlo a la vez desde varios hilos o procesos sobre el mismo csv. Con
+        Anexos activo las filas se encolan y los errores de escritura solo quedan en el
+        log y en Anexos.vaciar
 
         Args:
             ruta_csv (str): Ruta a actualizar, debe ser absoluta
@@ -144,71 +282,471 @@ class Archivo:
         res, msj = Validaciones.es_ruta_absoluta(ruta_csv, credenciales)
         if not res:
             return None, msj
-        # Validar que 'ruta_csv' sea del tipo csv
-        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales)
+        # Validar que 'ruta_csv' sea del tipo csv, comprimido o no
+        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales, True)
+        if not res:
+            return None, msj
+        # Validar que la carpeta donde estará 'ruta_csv' exista
+        res, msj = Validaciones.existe_carpeta(os.path.dirname(ruta_csv), credenciales)
+        if not res:
+            return None, msj
+        with Metricas.fase("archivo.actualizar_csv.validacion"):
+            # Validar que 'filas' sea del tipo list
+            res, msj = Validaciones.es_tipo(filas, list, credenciales)
+            if not res:
+                return None, msj
+            # Validar que 'columnas' sea del tipo list
+            res, msj = Validaciones.es_tipo(columnas, list, credenciales)
+            if not res:
+                return None, msj
+            len_values = -1
+            for lst in filas:
+                # Validar que cada componente sea una lista y tenga la misma longitud
+                res, msj = Validaciones.es_tipo(lst, list, credenciales)
+                if not res:
+                    return None, msj
+                if len_values == -1:
+                    len_values = len(lst)
+                else:
+                    # Validar que cada componente tenga el mismo len
+                    res, msj = Validaciones.es_len_correcto(
+                        lst, len_values, credenciales
+                    )
+                    if not res:
+                        return None, msj
+            # Validar que 'columnas' tenga el mismo len que cada lista de filas
+            res, msj = Validaciones.es_len_correcto(columnas, len_values)
+            if not res:
+                return None, msj
+        nuevas = tuple(str(c) for c in columnas)
+        # Con el buffer de Anexos activo las filas se escriben después junto con las de
+        # otros hilos
+        if Anexos.esta_activo():
+            Anexos.encolar(ruta_csv, nuevas, filas, _anexar_csv)
+            return ruta_csv, None
+        return _anexar_csv(ruta_csv, nuevas, [filas])
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.leer_csv")
+    def leer_csv(ruta_csv: str, credenciales: dict = {}) -> tuple[Any, str]:
+        """Carga el archivo csv, comprimido o no, como df. Los csv comprimidos se
+        descomprimen en streaming, sin pasar por un archivo temporal
+
+        Args:
+            ruta_csv (str): Ruta a leer, debe ser absoluta
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[pandas.DataFrame, str]: Datos del csv y mensaje de error
+        """
+        # Validar que 'ruta_csv' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_csv, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'ruta_csv' sea del tipo csv, comprimido o no
+        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales, True)
         if not res:
             return None, msj
         # Validar que el archivo en 'ruta_csv' exista
         res, msj = Validaciones.existe_archivo(ruta_csv, credenciales)
         if not res:
-            # Si no existe, intenta crear el csv con la función anterior
-            res, msj = Archivo.crear_csv(ruta_csv, filas, columnas, credenciales)
-            return res, msj
-        # Como el archivo en 'ruta_csv' existe, intenta cargarse como df
+            return None, msj
+        # pandas se importa recién aquí para no cargarlo al importar el paquete
+        import pandas as pd
+
+        # Intenta cargar el csv como df
         try:
-            df = pd.read_csv(ruta_csv, encoding=Constantes.encoding.value)
+            with Metricas.fase("archivo.leer_csv.disco"):
+                with _abrir(ruta_csv, "r", newline="") as f:
+                    df = pd.read_csv(f)
+            if Metricas.esta_activo():
+                leidos = os.path.getsize(ruta_csv)
+                Metricas.sumar_bytes("archivo.leer_csv", leidos=leidos)
+            return df, None
         except Exception as e:
             mensaje = f"No se cargó el csv como df, problema imprevisto: {e}"
             logger.exception(mensaje)
             return None, "Error archivo"
-        # Validar que 'filas' sea del tipo list
-        res, msj = Validaciones.es_tipo(filas, list, credenciales)
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.upsert_csv")
+    def upsert_csv(
+        ruta_csv: str,
+        filas: list[list[Any]],
+        columnas: list[Any],
+        claves: list[Any],
+        umbral_compactacion: float = 0.5,
+        credenciales: dict = {},
+    ) -> tuple[str, str]:
+        """Inserta o reemplaza filas del csv según sus columnas clave, sin
+        reescribirlo. Las filas nuevas o modificadas se agregan al final y un índice
+        en el archivo '<ruta_csv>.idx' apunta a la versión vigente de cada clave. Las
+        versiones reemplazadas quedan en el csv hasta que se compacta, por lo que quien
+        lea el csv completo sin el índice las verá. Si en 'filas' se repite una clave,
+        vale la última
+
+        Args:
+            ruta_csv (str): Ruta del csv, debe ser absoluta. Si no existe se crea
+            filas (list[list[Any]]): Los datos a insertar o reemplazar
+            columnas (list[Any]): Nombres de las columnas de 'filas'
+            claves (list[Any]): Columnas que identifican cada fila
+            umbral_compactacion (float): Proporción de filas reemplazadas desde la que
+                se compacta el csv al terminar; None para no compactar
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[str, str]: Ruta del csv y mensaje de error
+        """
+        # Validar que 'ruta_csv' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_csv, credenciales)
         if not res:
             return None, msj
-        # Validar que 'columnas' sea del tipo list
-        res, msj = Validaciones.es_tipo(columnas, list, credenciales)
+        # Validar que 'ruta_csv' sea del tipo csv
+        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales)
+        if not res:
+            return None, msj
+        # Validar que la carpeta donde estará 'ruta_csv' exista
+        res, msj = Validaciones.existe_carpeta(os.path.dirname(ruta_csv), credenciales)
         if not res:
             return None, msj
-        len_values = -1
-        for lst in filas:
-            # Validar que cada componente sea una lista y tenga la misma longitud
-            res, msj = Validaciones.es_tipo(lst, list, credenciales)
+        with Metricas.fase("archivo.upsert_csv.validacion"):
+            # Validar que 'filas' sea del tipo list
+            res, msj = Validaciones.es_tipo(filas, list, credenciales)
             if not res:
                 return None, msj
-            if len_values == -1:
-                len_values = len(lst)
-            else:
-                # Validar que cada componente tenga el mismo len
-                res, msj = Validaciones.es_len_correcto(lst, len_values, credenciales)
+            # Validar que 'columnas' sea del tipo list
+            res, msj = Validaciones.es_tipo(columnas, list, credenciales)
+            if not res:
+                return None, msj
+            # Validar que 'claves' sea del tipo list
+            res, msj = Validaciones.es_tipo(claves, list, credenciales)
+            if not res:
+                return None, msj
+            for lista in filas:
+                # Validar que cada componente sea una lista con el len de 'columnas'
+                res, msj = Validaciones.es_tipo(lista, list, credenciales)
+                if not res:
+                    return None, msj
+                res, msj = Validaciones.es_len_correcto(
+                    lista, len(columnas), credenciales
+                )
                 if not res:
                     return None, msj
-        # Validar que 'columnas' tenga el mismo len que cada lista de filas
-        res, msj = Validaciones.es_len_correcto(columnas, len_values)
+        # Validar que las claves sean columnas
+        if not claves or not set(claves).issubset(set(columnas)):
+            mensaje = f"Las claves {claves} no se incluyen en: {columnas}"
+            logger.error(mensaje)
+            return None, "Error archivo"
+        # Los nombres de columnas quedan como texto en la cabecera del csv
+        columnas = [str(c) for c in columnas]
+        claves = [str(c) for c in claves]
+        # Intenta insertar o reemplazar las filas
+        try:
+            with bloquear(ruta_csv) as fd:
+                with Metricas.fase("archivo.upsert_csv.indice"):
+                    if os.fstat(fd).st_size:
+                        indice = IndiceCsv.abrir(ruta_csv, claves)
+                    else:
+                        indice = IndiceCsv.crear(ruta_csv, claves, columnas)
+                # Validar que las columnas coincidan con las del csv
+                if sorted(indice.columnas) != sorted(columnas):
+                    mensaje = f"Las columnas del csv no coinciden con: {columnas}"
+                    logger.error(mensaje)
+                    return None, "Error archivo"
+                if indice.columnas != columnas:
+                    orden = [columnas.index(c) for c in indice.columnas]
+                    filas = [[fila[i] for i in orden] for fila in filas]
+                # Se deja una línea por clave, la última del lote
+                nuevas = {indice.clave_de(fila): serializar(fila) for fila in filas}
+                with Metricas.fase("archivo.upsert_csv.disco"):
+                    # Se omiten las filas que no cambiaron
+                    actuales = indice.leer_brutos(list(nuevas))
+                    cambios = [
+                        (clave, bruto)
+                        for clave, bruto in nuevas.items()
+                        if actuales.get(clave) != bruto
+                    ]
+                    indice.agregar(cambios)
+                    if Metricas.esta_activo():
+                        Metricas.sumar_bytes(
+                            "archivo.upsert_csv",
+                            leidos=sum(len(b) for b in actuales.values()),
+                            escritos=sum(len(b) for _, b in cambios),
+                        )
+                    if (
+                        umbral_compactacion is not None
+                        and indice.entradas
+                        and indice.muertos / indice.entradas > umbral_compactacion
+                    ):
+                        indice.compactar()
+            return ruta_csv, None
+        except Exception as e:
+            mensaje = f"Error al actualizar {ruta_csv}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error archivo"
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.buscar_csv")
+    def buscar_csv(
+        ruta_csv: str,
+        valores_clave: list[Any],
+        claves: list[Any] = None,
+        credenciales: dict = {},
+    ) -> tuple[dict[str, str], str]:
+        """Busca la fila vigente de una clave usando el índice del csv, sin recorrerlo.
+        Si el índice falta o el csv se modificó por fuera de upsert_csv, se
+        reconstruye
+
+        Args:
+            ruta_csv (str): Ruta del csv, debe ser absoluta
+            valores_clave (list[Any]): Valores de las columnas clave, en su orden
+            claves (list[Any]): Columnas clave; None para usar las del índice
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[dict[str, str], str]: Fila como columna -> valor, o None si la clave
+            no existe, y mensaje de error
+        """
+        # Validar que 'ruta_csv' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_csv, credenciales)
         if not res:
             return None, msj
-        # Validar que las columnas del csv estén incluidas en las nuevas columnas
-        if set(df.columns.tolist()).issubset(set(columnas)):
-            mensaje = f"Las columnas del csv se incluyen en: {columnas}"
-            logger.info(mensaje)
-        else:
-            mensaje = f"Las columnas del csv no se incluyen en: {columnas}"
-            logger.error(mensaje)
+        # Validar que 'ruta_csv' sea del tipo csv
+        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales)
+        if not res:
+            return None, msj
+        # Validar que el archivo en 'ruta_csv' exista
+        res, msj = Validaciones.existe_archivo(ruta_csv, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'valores_clave' sea del tipo list
+        res, msj = Validaciones.es_tipo(valores_clave, list, credenciales)
+        if not res:
+            return None, msj
+        clave = normalizar(valores_clave)
+        # Intenta leer la fila
+        try:
+            with bloquear(ruta_csv, compartido=True):
+                indice = IndiceCsv.abrir(ruta_csv, claves)
+                fila = indice.leer(clave)
+                if fila is not None and indice.clave_de(fila) != clave:
+                    # El índice no corresponde al csv aunque su tamaño coincida
+                    indice = IndiceCsv.reconstruir(ruta_csv, indice.claves)
+                    fila = indice.leer(clave)
+            if fila is None:
+                return None, None
+            if Metricas.esta_activo():
+                rango = indice.mapa[clave]
+                Metricas.sumar_bytes("archivo.buscar_csv", leidos=rango[1] - rango[0])
+            return dict(zip(indice.columnas, fila)), None
+        except Exception as e:
+            mensaje = f"Error al buscar en {ruta_csv}, problema imprevisto: {e}"
+            logger.exception(mensaje)
             return None, "Error archivo"
-        # Intenta actulizar el csv
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.compactar_csv")
+    def compactar_csv(
+        ruta_csv: str, claves: list[Any] = None, credenciales: dict = {}
+    ) -> tuple[str, str]:
+        """Reescribe el csv dejando solo la versión vigente de cada clave, en el orden
+        en que se insertaron, y regenera su índice
+
+        Args:
+            ruta_csv (str): Ruta del csv, debe ser absoluta
+            claves (list[Any]): Columnas clave; None para usar las del índice
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[str, str]: Ruta del csv y mensaje de error
+        """
+        # Validar que 'ruta_csv' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_csv, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'ruta_csv' sea del tipo csv
+        res, msj = Validaciones.es_tipo_archivo(ruta_csv, ".csv", credenciales)
+        if not res:
+            return None, msj
+        # Validar que el archivo en 'ruta_csv' exista
+        res, msj = Validaciones.existe_archivo(ruta_csv, credenciales)
+        if not res:
+            return None, msj
+        # Intenta compactar el csv
         try:
-            # Se crea un df_aux a partir de la información de entrada
-            df_aux = pd.DataFrame(filas, columnas)
-            # Se concatenan las nuevas filas
-            df = pd.concat([df, df_aux])
-            # Se guarda el csv en la ruta definida
-            df.to_csv(ruta_csv, index=False, encoding=Constantes.encoding.value)
+            with bloquear(ruta_csv, crear=False):
+                indice = IndiceCsv.abrir(ruta_csv, claves)
+                muertos = indice.muertos
+                with Metricas.fase("archivo.compactar_csv.disco"):
+                    indice.compactar()
+            mensaje = f"Se quitaron {muertos} filas reemplazadas de {ruta_csv}"
+            logger.info(mensaje)
             return ruta_csv, None
         except Exception as e:
-            mensaje = f"Error al operar con los df, problema imprevisto: {e}"
+            mensaje = f"Error al compactar {ruta_csv}, problema imprevisto: {e}"
             logger.exception(mensaje)
             return None, "Error archivo"
 
     @staticmethod
+    @Metricas.instrumentar("archivo.cargar_csv_sqlite")
+    def cargar_csv_sqlite(
+        rutas_csv: list[str],
+        ruta_bd: str,
+        tabla: str = None,
+        columnas_indice: list[str] = None,
+        tipos: dict[str, str] = None,
+        credenciales: dict = {},
+    ) -> tuple[int, str]:
+        """Carga uno o más csv, comprimidos o no, en una base SQLite. Cada csv se
+        carga en una transacción, insertando por lotes con executemany, y los índices
+        se crean al final. La tabla '_cargas' de la base recuerda hasta dónde se cargó
+        cada csv, así que al repetir la carga solo se insertan las filas agregadas
+        desde la anterior; si el csv se reemplazó, por ejemplo al compactarlo o al
+        agregar columnas, se vuelve a cargar completo. Las versiones de una clave que
+        upsert_csv dejó en el csv se cargan como filas distintas. Cada fila guarda en
+        la columna '_archivo' el id del csv del que viene. Una última línea sin salto
+        de línea en un csv que se modificó hace poco se deja, con una advertencia,
+        para la próxima carga, por si se está escribiendo
+
+        Args:
+            rutas_csv (list[str]): Rutas de los csv, deben ser absolutas; también se
+                acepta una sola ruta
+            ruta_bd (str): Ruta de la base, debe ser absoluta; se crea si no existe
+            tabla (str): Tabla para todos los csv; None para una tabla por csv con el
+                nombre del archivo sin extensión
+            columnas_indice (list[str]): Columnas a indexar, un índice por columna
+            tipos (dict[str, str]): Tipo SQL por columna, por ejemplo {'monto':
+                'REAL'}; las demás guardan el texto del csv
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[int, str]: Filas cargadas y mensaje de error
+        """
+        if isinstance(rutas_csv, str):
+            rutas_csv = [rutas_csv]
+        # Validar que 'rutas_csv' sea del tipo list
+        res, msj = Validaciones.es_tipo(rutas_csv, list, credenciales)
+        if not res:
+            return None, msj
+        for ruta_csv in rutas_csv:
+            # Validar que 'ruta_csv' sea del tipo csv, comprimido o no
+            res, msj = Validaciones.es_tipo_archivo(
+                ruta_csv, ".csv", credenciales, True
+            )
+            if not res:
+                return None, msj
+            # Validar que el archivo en 'ruta_csv' exista
+            res, msj = Validaciones.existe_archivo(ruta_csv, credenciales)
+            if not res:
+                return None, msj
+        # Validar que 'ruta_bd' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_bd, credenciales)
+        if not res:
+            return None, msj
+        # Validar que exista la carpeta de 'ruta_bd'
+        res, msj = Validaciones.existe_carpeta(os.path.dirname(ruta_bd), credenciales)
+        if not res:
+            return None, msj
+        # carga_sqlite se importa recién aquí para no cargar sqlite3 al importar el
+        # paquete
+        from . import carga_sqlite
+
+        # Intenta cargar los csv
+        try:
+            total, tablas = 0, set()
+            conexion = carga_sqlite.conectar(ruta_bd)
+            try:
+                for ruta_csv in rutas_csv:
+                    destino = tabla or carga_sqlite.nombre_tabla(ruta_csv)
+                    with Metricas.fase("archivo.cargar_csv_sqlite.carga"):
+                        cargadas, descartadas, pendientes = carga_sqlite.cargar(
+                            conexion,
+                            ruta_csv,
+                            destino,
+                            tipos or {},
+                            Archivo.tamano_bloque_sqlite,
+                        )
+                    if descartadas:
+                        mensaje = f"{descartadas} filas mal formadas en {ruta_csv}"
+                        logger.warning(mensaje)
+                    if pendientes:
+                        mensaje = (
+                            f"La última línea de {ruta_csv} no termina en salto de "
+                            "línea y se está escribiendo, se carga en la próxima carga"
+                        )
+                        logger.warning(mensaje)
+                    total += cargadas
+                    tablas.add(destino)
+                if columnas_indice:
+                    with Metricas.fase("archivo.cargar_csv_sqlite.indices"):
+                        for destino in tablas:
+                            carga_sqlite.indexar(conexion, destino, columnas_indice)
+                conexion.execute("PRAGMA optimize")
+            finally:
+                conexion.close()
+            if Metricas.esta_activo():
+                leidos = sum(os.path.getsize(ruta) for ruta in rutas_csv)
+                Metricas.sumar_bytes("archivo.cargar_csv_sqlite", leidos=leidos)
+            mensaje = f"Se cargaron {total} filas en {ruta_bd}"
+            logger.info(mensaje)
+            return total, None
+        except Exception as e:
+            mensaje = f"No se cargaron los csv en {ruta_bd}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error archivo"
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.consultar_sqlite")
+    def consultar_sqlite(
+        ruta_bd: str,
+        consulta: str,
+        parametros: list[Any] = None,
+        credenciales: dict = {},
+    ) -> tuple[Any, str]:
+        """Ejecuta una consulta sobre una base cargada con cargar_csv_sqlite y devuelve
+        el resultado como df. La base se abre en solo lectura
+
+        Args:
+            ruta_bd (str): Ruta de la base, debe ser absoluta
+            consulta (str): Consulta SQL, con '?' para los parámetros
+            parametros (list[Any]): Valores de los parámetros de la consulta
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[pandas.DataFrame, str]: Resultado de la consulta y mensaje de error
+        """
+        # Validar que 'ruta_bd' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_bd, credenciales)
+        if not res:
+            return None, msj
+        # Validar que el archivo en 'ruta_bd' exista
+        res, msj = Validaciones.existe_archivo(ruta_bd, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'consulta' sea del tipo str
+        res, msj = Validaciones.es_tipo(consulta, str, credenciales)
+        if not res:
+            return None, msj
+        # pandas y sqlite3 se importan recién aquí para no cargarlos al importar el
+        # paquete
+        import sqlite3
+
+        import pandas as pd
+
+        # Intenta ejecutar la consulta
+        try:
+            uri = f"{pathlib.Path(ruta_bd).as_uri()}?mode=ro"
+            with contextlib.closing(sqlite3.connect(uri, uri=True)) as conexion:
+                with Metricas.fase("archivo.consultar_sqlite.consulta"):
+                    df = pd.read_sql_query(consulta, conexion, params=parametros)
+            return df, None
+        except Exception as e:
+            mensaje = f"Error al consultar {ruta_bd}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error archivo"
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.crear_txt")
     def crear_txt(
         ruta_txt: str, texto: str, credenciales: dict = {}
     ) -> tuple[str, str]:
@@ -226,8 +764,8 @@ class Archivo:
         res, msj = Validaciones.es_ruta_absoluta(ruta_txt, credenciales)
         if not res:
             return None, msj
-        # Validar que 'ruta_txt' sea del tipo txt
-        res, msj = Validaciones.es_tipo_archivo(ruta_txt, ".txt", credenciales)
+        # Validar que 'ruta_txt' sea del tipo txt, comprimido o no
+        res, msj = Validaciones.es_tipo_archivo(ruta_txt, ".txt", credenciales, True)
         if not res:
             return None, msj
         # Validar que la carpeta donde estará 'ruta_txt' exista
@@ -241,9 +779,13 @@ class Archivo:
         # Intenta crear el txt
         try:
             # Abrir el archivo en modo escribir ('w')
-            with open(ruta_txt, "w", encoding=Constantes.encoding.value) as f:
-                # Escribir un nuevo archivo
-                f.write(texto)
+            with Metricas.fase("archivo.crear_txt.disco"):
+                with _abrir(ruta_txt, "w") as f:
+                    # Escribir un nuevo archivo
+                    f.write(texto)
+            if Metricas.esta_activo():
+                escritos = len(texto.encode(Constantes.encoding.value))
+                Metricas.sumar_bytes("archivo.crear_txt", escritos=escritos)
             return ruta_txt, None
         except Exception as e:
             mensaje = f"Error al escribir en {ruta_txt}, problema imprevisto: {e}"
@@ -251,10 +793,14 @@ class Archivo:
             return None, "Error archivo"
 
     @staticmethod
+    @Metricas.instrumentar("archivo.actualizar_txt")
     def actualizar_txt(
         ruta_txt: str, texto: str, credenciales: dict = {}
     ) -> tuple[str, str]:
-        """Actualiza el archivo de texto en la ruta indicada
+        """Actualiza el archivo de texto en la ruta indicada, agregando el texto al
+        final con una sola escritura. Es seguro llamarlo a la vez desde varios hilos o
+        procesos sobre el mismo archivo. Con Anexos activo el texto se encola y los
+        errores de escritura solo quedan en el log y en Anexos.vaciar
 
         Args:
             ruta_txt (str): Ruta a actualizar, debe ser absoluta
@@ -268,8 +814,8 @@ class Archivo:
         res, msj = Validaciones.es_ruta_absoluta(ruta_txt, credenciales)
         if not res:
             return None, msj
-        # Validar que 'ruta_txt' sea del tipo txt
-        res, msj = Validaciones.es_tipo_archivo(ruta_txt, ".txt", credenciales)
+        # Validar que 'ruta_txt' sea del tipo txt, comprimido o no
+        res, msj = Validaciones.es_tipo_archivo(ruta_txt, ".txt", credenciales, True)
         if not res:
             return None, msj
         # Validar que la carpeta donde estará 'ruta_txt' exista
@@ -280,19 +826,53 @@ class Archivo:
         res, msj = Validaciones.es_tipo(texto, str, credenciales)
         if not res:
             return None, msj
-        # Intenta actualizar el csv
-        try:
-            # Abrir el archivo en modo añadir ('a')
-            with open(ruta_txt, "a", encoding=Constantes.encoding.value) as f:
-                # Escribir nuevas líneas al final del archivo
-                f.write(texto)
+        # Con el buffer de Anexos activo el texto se escribe después junto con el de
+        # otros hilos
+        if Anexos.esta_activo():
+            Anexos.encolar(ruta_txt, None, texto, _anexar_txt)
             return ruta_txt, None
+        return _anexar_txt(ruta_txt, None, [texto])
+
+    @staticmethod
+    @Metricas.instrumentar("archivo.leer_txt")
+    def leer_txt(ruta_txt: str, credenciales: dict = {}) -> tuple[str, str]:
+        """Lee el archivo de texto, comprimido o no, en la ruta indicada
+
+        Args:
+            ruta_txt (str): Ruta a leer, debe ser absoluta
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[str, str]: Texto del archivo y mensaje de error
+        """
+        # Validar que 'ruta_txt' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_txt, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'ruta_txt' sea del tipo txt, comprimido o no
+        res, msj = Validaciones.es_tipo_archivo(ruta_txt, ".txt", credenciales, True)
+        if not res:
+            return None, msj
+        # Validar que el archivo en 'ruta_txt' exista
+        res, msj = Validaciones.existe_archivo(ruta_txt, credenciales)
+        if not res:
+            return None, msj
+        # Intenta leer el txt
+        try:
+            with Metricas.fase("archivo.leer_txt.disco"):
+                with _abrir(ruta_txt, "r") as f:
+                    texto = f.read()
+            if Metricas.esta_activo():
+                leidos = os.path.getsize(ruta_txt)
+                Metricas.sumar_bytes("archivo.leer_txt", leidos=leidos)
+            return texto, None
         except Exception as e:
-            mensaje = f"Error al escribir en {ruta_txt}, problema imprevisto: {e}"
+            mensaje = f"Error al leer {ruta_txt}, problema imprevisto: {e}"
             logger.exception(mensaje)
             return None, "Error archivo"
 
     @staticmethod
+    @Metricas.instrumentar("archivo.crear_docx")
     def crear_docx(
         ruta_docx: str,
         ruta_plantilla: str,
@@ -338,12 +918,16 @@ class Archivo:
         res, msj = Validaciones.es_tipo(datos, list, credenciales)
         if not res:
             return None, msj
+        # docxtpl se importa recién aquí para no cargarlo al importar el paquete
+        from docxtpl import DocxTemplate
+
         # Intenta crear el docx. Cargar los datos recolectados en las variables de la
         # plantilla. Se asume que la cantidad de espacios en la plantilla elegida es
         # igual al de 'datos'
         try:
             # Cargar plantilla de archivo de salida
-            doc = DocxTemplate(ruta_plantilla)
+            with Metricas.fase("archivo.crear_docx.disco"):
+                doc = DocxTemplate(ruta_plantilla)
             context = {}
             for pos, dato in enumerate(datos):
                 # Validar que cada componente sea del tipo str
@@ -351,9 +935,17 @@ class Archivo:
                 if res:
                     context[f"p{pos}"] = dato
             # Reemplazar los contenidos de las variables de la plantilla
-            doc.render(context)
+            with Metricas.fase("archivo.crear_docx.plantilla"):
+                doc.render(context)
             # Guardar los resultados en un archivo de salida
-            doc.save(ruta_docx)
+            with Metricas.fase("archivo.crear_docx.disco"):
+                doc.save(ruta_docx)
+            if Metricas.esta_activo():
+                Metricas.sumar_bytes(
+                    "archivo.crear_docx",
+                    leidos=os.path.getsize(ruta_plantilla),
+                    escritos=os.path.getsize(ruta_docx),
+                )
             return ruta_docx, None
         except PermissionError as e:
             mensaje = f"El archivo docx o la plantilla están abiertos: {e}"
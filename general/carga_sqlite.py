@@ -0,0 +1,246 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Iterator
+from typing import IO, Any
+
+from . import compresion
+from .constantes import Constantes
+
+# Pragmas de cada conexión de carga: WAL con synchronous=NORMAL no sincroniza el disco
+# en cada commit y deja leer mientras se carga, y la caché grande evita releer páginas
+# al insertar. La base es derivada de los csv, así que se puede volver a generar
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+]
+# Segundos sin cambios desde los que un csv sin comprimir se da por terminado y se
+# carga también su última línea aunque no tenga salto de línea
+ESPERA_COLA = 2.0
+# Una fila por csv cargado, con lo necesario para seguir desde donde quedó
+TABLA_CARGAS = "_cargas"
+COLUMNA_ARCHIVO = "_archivo"
+
+
+def identificador(nombre: str) -> str:
+    """Escapa un nombre de tabla o columna para usarlo en SQL"""
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def nombre_tabla(ruta_csv: str) -> str:
+    """Nombre de tabla por defecto: el del archivo sin la extensión .csv ni la de
+    compresión
+    """
+    nombre = os.path.basename(ruta_csv)
+    extension = compresion.extension_compresion(nombre)
+    if extension:
+        nombre = nombre[: -len(extension)]
+    return nombre[:-4] if nombre.endswith(".csv") else nombre
+
+
+def conectar(ruta_bd: str) -> sqlite3.Connection:
+    """Abre la base en modo autocommit, para manejar las transacciones a mano, y crea
+    la tabla de cargas si no existe
+    """
+    conexion = sqlite3.connect(ruta_bd, timeout=60, isolation_level=None)
+    for pragma in PRAGMAS:
+        conexion.execute(pragma)
+    conexion.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLA_CARGAS} (id INTEGER PRIMARY KEY, "
+        "ruta TEXT UNIQUE, tabla TEXT, columnas TEXT, inodo INTEGER, tamano INTEGER, "
+        "posicion INTEGER, filas INTEGER, fecha REAL)"
+    )
+    return conexion
+
+
+def _columnas_tabla(conexion: sqlite3.Connection, tabla: str) -> list[str]:
+    cursor = conexion.execute(f"PRAGMA table_info({identificador(tabla)})")
+    return [fila[1] for fila in cursor]
+
+
+def _preparar_tabla(
+    conexion: sqlite3.Connection,
+    tabla: str,
+    columnas: list[str],
+    tipos: dict[str, str],
+) -> None:
+    """Crea la tabla o le agrega las columnas que le falten. Las columnas sin tipo
+    guardan los valores como texto, tal como están en el csv
+    """
+    existentes = _columnas_tabla(conexion, tabla)
+    definiciones = [
+        f"{identificador(c)} {tipos.get(c, '')}".rstrip()
+        for c in columnas
+        if c not in existentes
+    ]
+    if not existentes:
+        definiciones.insert(0, f"{identificador(COLUMNA_ARCHIVO)} INTEGER")
+        conexion.execute(
+            f"CREATE TABLE {identificador(tabla)} ({', '.join(definiciones)})"
+        )
+        return
+    for definicion in definiciones:
+        conexion.execute(f"ALTER TABLE {identificador(tabla)} ADD COLUMN {definicion}")
+
+
+def _registros(
+    f: IO, tamano_bloque: int, limite: int = None, cola: bool = False
+) -> Iterator[tuple[list[list[str]], int, int]]:
+    """Recorre las filas completas del csv desde la posición actual, leyendo bloques
+    de 'tamano_bloque' bytes hasta la posición 'limite', si se indica. Entrega
+    (filas, posición después de la última fila, bytes que quedan sin cargar). Una
+    última línea sin salto de línea solo se entrega con 'cola', cuando el archivo ya
+    no se está escribiendo; si no, queda para la próxima carga
+    """
+    encoding = Constantes.encoding.value
+    posicion, resto = f.tell(), b""
+    while True:
+        tamano = tamano_bloque
+        if limite is not None:
+            tamano = min(tamano, limite - posicion - len(resto))
+        try:
+            bloque = f.read(tamano) if tamano > 0 else b""
+        except EOFError:
+            # Un miembro comprimido que se está escribiendo todavía no terminó; se
+            # carga hasta lo anterior y el resto en la próxima carga
+            return
+        datos = resto + bloque
+        # Se corta en el último salto de línea que no esté dentro de un campo entre
+        # comillas, es decir con una cantidad par de comillas antes. Al final del
+        # archivo la cola se toma completa si está permitido
+        if bloque or not cola:
+            corte = datos.rfind(b"\n") + 1
+        else:
+            corte = len(datos)
+        comillas = datos.count(b'"', 0, corte)
+        while corte > 0 and comillas % 2:
+            anterior = datos.rfind(b"\n", 0, corte - 1) + 1
+            comillas -= datos.count(b'"', anterior, corte)
+            corte = anterior
+        if corte:
+            texto = datos[:corte].decode(encoding)
+            posicion += corte
+            filas = [fila for fila in csv.reader(io.StringIO(texto)) if fila]
+            yield filas, posicion, len(datos) - corte
+        resto = datos[corte:]
+        if not bloque:
+            if resto:
+                yield [], posicion, len(resto)
+            return
+
+
+def cargar(
+    conexion: sqlite3.Connection,
+    ruta_csv: str,
+    tabla: str,
+    tipos: dict[str, str],
+    tamano_bloque: int,
+) -> tuple[int, int, int]:
+    """Carga en una transacción las filas del csv agregadas desde la última carga. Si
+    el csv se reemplazó, se achicó o cambió sus columnas, sus filas se borran y se
+    carga completo. Una última línea sin salto de línea se carga si el csv está
+    comprimido, porque sus miembros se escriben completos, o si lleva ESPERA_COLA
+    segundos sin cambios o no cambió desde la carga anterior; si no, puede estar a
+    medio escribir y queda para la próxima carga
+
+    Returns:
+        tuple[int, int, int]: Filas cargadas, filas descartadas por tener otra
+        cantidad de columnas y bytes que quedaron sin cargar
+    """
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        stat = os.stat(ruta_csv)
+        with compresion.abrir(ruta_csv, "rb") as f:
+            cabecera = f.readline()
+            if not cabecera.strip():
+                conexion.execute("ROLLBACK")
+                return 0, 0, 0
+            columnas = next(csv.reader([cabecera.decode(Constantes.encoding.value)]))
+            previa = conexion.execute(
+                f"SELECT id, tabla, columnas, inodo, tamano, posicion "
+                f"FROM {TABLA_CARGAS} WHERE ruta = ?",
+                (ruta_csv,),
+            ).fetchone()
+            posicion = len(cabecera)
+            if previa is None:
+                id_carga = conexion.execute(
+                    f"INSERT INTO {TABLA_CARGAS} (ruta, filas) VALUES (?, 0)",
+                    (ruta_csv,),
+                ).lastrowid
+            elif (
+                previa[1] != tabla
+                or json.loads(previa[2]) != columnas
+                or previa[3] != stat.st_ino
+                or previa[4] > stat.st_size
+            ):
+                id_carga = previa[0]
+                if _columnas_tabla(conexion, previa[1]):
+                    conexion.execute(
+                        f"DELETE FROM {identificador(previa[1])} "
+                        f"WHERE {COLUMNA_ARCHIVO} = ?",
+                        (id_carga,),
+                    )
+                conexion.execute(
+                    f"UPDATE {TABLA_CARGAS} SET filas = 0 WHERE id = ?", (id_carga,)
+                )
+            else:
+                id_carga, posicion = previa[0], previa[5]
+            # Un csv sin comprimir se lee solo hasta el tamaño que tenía al empezar
+            comprimido = compresion.extension_compresion(ruta_csv) is not None
+            limite = None if comprimido else stat.st_size
+            cola = (
+                comprimido
+                or time.time() - stat.st_mtime >= ESPERA_COLA
+                or (previa is not None and previa[4] == stat.st_size)
+            )
+            _preparar_tabla(conexion, tabla, columnas, tipos)
+            nombres = ", ".join(map(identificador, [COLUMNA_ARCHIVO, *columnas]))
+            # El id del csv va fijo en la sentencia para pasar las filas tal como las
+            # entrega csv.reader, sin copiarlas
+            marcas = ", ".join([str(int(id_carga))] + ["?"] * len(columnas))
+            sentencia = (
+                f"INSERT INTO {identificador(tabla)} ({nombres}) VALUES ({marcas})"
+            )
+            f.seek(posicion)
+            cargadas, descartadas, cantidad = 0, 0, len(columnas)
+            pendientes = 0
+            registros = _registros(f, tamano_bloque, limite, cola)
+            for filas, posicion, pendientes in registros:
+                validas = [fila for fila in filas if len(fila) == cantidad]
+                conexion.executemany(sentencia, validas)
+                cargadas += len(validas)
+                descartadas += len(filas) - len(validas)
+        conexion.execute(
+            f"UPDATE {TABLA_CARGAS} SET tabla = ?, columnas = ?, inodo = ?, "
+            "tamano = ?, posicion = ?, filas = filas + ?, fecha = ? WHERE id = ?",
+            (
+                tabla,
+                json.dumps(columnas, ensure_ascii=False),
+                stat.st_ino,
+                stat.st_size,
+                posicion,
+                cargadas,
+                time.time(),
+                id_carga,
+            ),
+        )
+        conexion.execute("COMMIT")
+        return cargadas, descartadas, pendientes
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+
+
+def indexar(conexion: sqlite3.Connection, tabla: str, columnas: list[Any]) -> None:
+    """Crea, si no existen, los índices de una columna cada uno"""
+    for columna in columnas:
+        nombre = identificador(f"idx_{tabla}_{columna}")
+        conexion.execute(
+            f"CREATE INDEX IF NOT EXISTS {nombre} "
+            f"ON {identificador(tabla)} ({identificador(columna)})"
+        )
@@ -1,23 +1,32 @@
 import logging
 import os
 import shutil
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
 
-from .log import setup_logging
+from . import empaquetado
+from .metricas import Metricas
 from .validaciones import Validaciones
 
-# Configura el logging
-setup_logging()
+if TYPE_CHECKING:
+    from .vigilante import Vigilante
+
 # Obtiene un logger para este módulo
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
 
 
 class Carpeta:
-    """Una clase que contiene métodos para crear y borrar carpetas indicando la ruta
-    absoluta
+    """Una clase que contiene métodos para crear, borrar, listar, comprimir y vigilar
+    carpetas indicando la ruta absoluta
     """
 
+    # Bytes que se leen y comprimen de una vez; con hasta dos bloques en vuelo por
+    # hilo, la memoria de comprimir_carpeta no depende del tamaño de la carpeta
+    tamano_bloque = 1 << 20
+
     @staticmethod
+    @Metricas.instrumentar("carpeta.borrar_carpeta")
     def borrar_carpeta(ruta_carpeta: str, credenciales: dict = {}) -> tuple[str, str]:
         """Elimina la carpeta
 
@@ -38,7 +47,8 @@ class Carpeta:
             return ruta_carpeta, msj
         # Intenta borrar la carpeta
         try:
-            shutil.rmtree(ruta_carpeta)
+            with Metricas.fase("carpeta.borrar_carpeta.disco"):
+                shutil.rmtree(ruta_carpeta)
             mensaje = f"Carpeta borrada: {ruta_carpeta}"
             logger.info(mensaje)
             return ruta_carpeta, None
@@ -52,6 +62,7 @@ class Carpeta:
             return None, "Error carpeta"
 
     @staticmethod
+    @Metricas.instrumentar("carpeta.crear_carpeta")
     def crear_carpeta(ruta_carpeta: str, credenciales: dict = {}) -> tuple[str, str]:
         """Crea la carpeta
 
@@ -68,7 +79,8 @@ class Carpeta:
             return None, msj
         # Intenta crear la carpeta
         try:
-            os.makedirs(ruta_carpeta, exist_ok=True)
+            with Metricas.fase("carpeta.crear_carpeta.disco"):
+                os.makedirs(ruta_carpeta, exist_ok=True)
             mensaje = f"Carpeta creada: {ruta_carpeta}"
             logger.info(mensaje)
             return ruta_carpeta, None
@@ -80,3 +92,194 @@ class Carpeta:
             mensaje = f"No se creó la carpeta {ruta_carpeta}, problema imprevisto: {e}"
             logger.exception(mensaje)
             return None, "Error carpeta"
+
+    @staticmethod
+    @Metricas.instrumentar("carpeta.listar_archivos")
+    def listar_archivos(
+        ruta_carpeta: str,
+        tipos_esperados: list[str] = None,
+        recursivo: bool = True,
+        credenciales: dict = {},
+    ) -> tuple[list[str], str]:
+        """Lista los archivos de la carpeta ordenados por ruta. Omite los enlaces
+        simbólicos, tanto a carpetas, para no recorrer ciclos, como a archivos, para
+        no entregar archivos de fuera de la carpeta
+
+        Args:
+            ruta_carpeta (str): Ruta a listar, debe ser absoluta
+            tipos_esperados (list[str]): Extensiones a incluir, por ejemplo ['.csv',
+                '.docx'], o una sola como str; None para todas
+            recursivo (bool): Incluir los archivos de las subcarpetas
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[list[str], str]: Rutas absolutas de los archivos y mensaje de error
+        """
+        # Validar que 'ruta_carpeta' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_carpeta, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'ruta_carpeta' exista
+        res, msj = Validaciones.existe_carpeta(ruta_carpeta, credenciales)
+        if not res:
+            return None, msj
+        # Intenta recorrer la carpeta
+        try:
+            # Una sola extensión como str no se separa en caracteres
+            if isinstance(tipos_esperados, str):
+                tipos_esperados = [tipos_esperados]
+            tipos = tuple(tipos_esperados) if tipos_esperados else None
+            archivos, carpetas = [], [ruta_carpeta]
+            with Metricas.fase("carpeta.listar_archivos.disco"):
+                while carpetas:
+                    with os.scandir(carpetas.pop()) as entradas:
+                        for entrada in entradas:
+                            if entrada.is_dir(follow_symlinks=False):
+                                if recursivo:
+                                    carpetas.append(entrada.path)
+                            elif entrada.is_file(follow_symlinks=False) and (
+                                tipos is None or entrada.name.endswith(tipos)
+                            ):
+                                archivos.append(entrada.path)
+            archivos.sort()
+            return archivos, None
+        except Exception as e:
+            mensaje = f"No se listó la carpeta {ruta_carpeta}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error carpeta"
+
+    @staticmethod
+    @Metricas.instrumentar("carpeta.comprimir_carpeta")
+    def comprimir_carpeta(
+        ruta_carpeta: str,
+        formato: str = "zip",
+        tipos_esperados: list[str] = None,
+        recursivo: bool = True,
+        nivel: int = 6,
+        max_hilos: int = None,
+        credenciales: dict = {},
+    ) -> tuple[Iterator[bytes], str]:
+        """Comprime la carpeta en zip o tar.gz como un generador de trozos de bytes,
+        sin armar el archivo en memoria ni en disco, por ejemplo para devolverlo con
+        un StreamingResponse de FastAPI. Los archivos se leen por bloques y cada
+        bloque se comprime con deflate en un pool de hilos; los nombres dentro del
+        archivo son relativos a la carpeta. Los archivos que no se pueden abrir al
+        llegar su turno se omiten con un error en el log; otros errores de lectura
+        cortan el generador con la excepción
+
+        Args:
+            ruta_carpeta (str): Ruta a comprimir, debe ser absoluta
+            formato (str): 'zip' o 'tar.gz'
+            tipos_esperados (list[str]): Extensiones a incluir, como en
+                listar_archivos; None para todas
+            recursivo (bool): Incluir los archivos de las subcarpetas
+            nivel (int): Nivel de compresión de 0 (rápido) a 9 (más pequeño)
+            max_hilos (int): Hilos que comprimen; None para uno por CPU
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[Iterator[bytes], str]: Generador del archivo comprimido y mensaje de
+                error
+        """
+        # Validar que 'formato' sea uno de los soportados
+        if formato not in empaquetado.FORMATOS:
+            mensaje = f"Formato {formato!r} no soportado"
+            logger.error(mensaje)
+            return None, "Error carpeta"
+        # Validar que 'nivel' esté entre 0 y 9
+        if not isinstance(nivel, int) or not 0 <= nivel <= 9:
+            mensaje = f"Nivel de compresión {nivel!r} inválido"
+            logger.error(mensaje)
+            return None, "Error carpeta"
+        # Valida la ruta y busca los archivos antes de empezar a generar
+        rutas, msj = Carpeta.listar_archivos(
+            ruta_carpeta, tipos_esperados, recursivo, credenciales
+        )
+        if msj is not None:
+            return None, msj
+        archivos = [
+            (ruta, os.path.relpath(ruta, ruta_carpeta).replace(os.sep, "/"))
+            for ruta in rutas
+        ]
+        max_hilos = max_hilos or os.cpu_count() or 1
+        generador = empaquetado.FORMATOS[formato](
+            archivos, nivel, max_hilos, Carpeta.tamano_bloque
+        )
+
+        def generar() -> Iterator[bytes]:
+            escritos = 0
+            try:
+                for trozo in generador:
+                    escritos += len(trozo)
+                    yield trozo
+            except Exception as e:
+                mensaje = f"Se cortó la compresión de {ruta_carpeta}: {e}"
+                logger.exception(mensaje)
+                raise
+            if Metricas.esta_activo():
+                leidos = sum(os.path.getsize(ruta) for ruta in rutas)
+                Metricas.sumar_bytes(
+                    "carpeta.comprimir_carpeta", leidos=leidos, escritos=escritos
+                )
+            mensaje = f"Carpeta comprimida: {ruta_carpeta}, {len(archivos)} archivos"
+            logger.info(mensaje)
+
+        return generar(), None
+
+    @staticmethod
+    @Metricas.instrumentar("carpeta.vigilar_carpeta")
+    def vigilar_carpeta(
+        ruta_carpeta: str,
+        tipos_esperados: list[str] = None,
+        recursivo: bool = True,
+        espera: float = 0.5,
+        intervalo: float = 2.0,
+        sondeo: bool = False,
+        credenciales: dict = {},
+    ) -> tuple["Vigilante", str]:
+        """Empieza a vigilar la carpeta, en vez de listarla completa cada cierto tiempo
+        para buscar archivos nuevos. El Vigilante entrega los cambios como
+        Evento(tipo, ruta) con for o async for, juntando los de un mismo archivo, y
+        debe cerrarse con cerrar() o usándolo como context manager
+
+        Args:
+            ruta_carpeta (str): Ruta a vigilar, debe ser absoluta
+            tipos_esperados (list[str]): Extensiones a informar, como en
+                listar_archivos; None para todas
+            recursivo (bool): Vigilar también las subcarpetas
+            espera (float): Segundos sin cambios en un archivo antes de informarlo
+            intervalo (float): Segundos entre recorridos si no hay inotify
+            sondeo (bool): Recorrer la carpeta aunque haya inotify, para carpetas de
+                red
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[Vigilante, str]: Vigilante de la carpeta y mensaje de error
+        """
+        # Validar que 'ruta_carpeta' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_carpeta, credenciales)
+        if not res:
+            return None, msj
+        # Validar que 'ruta_carpeta' exista
+        res, msj = Validaciones.existe_carpeta(ruta_carpeta, credenciales)
+        if not res:
+            return None, msj
+        # vigilante se importa recién aquí para no cargar inotify ni asyncio al
+        # importar el paquete
+        from .vigilante import Vigilante
+
+        # Intenta empezar a vigilar la carpeta
+        try:
+            with Metricas.fase("carpeta.vigilar_carpeta.disco"):
+                vigilante = Vigilante(
+                    ruta_carpeta, tipos_esperados, recursivo, espera, intervalo, sondeo
+                )
+            mensaje = f"Carpeta vigilada con {vigilante.modo}: {ruta_carpeta}"
+            logger.info(mensaje)
+            return vigilante, None
+        except Exception as e:
+            mensaje = (
+                f"No se vigiló la carpeta {ruta_carpeta}, problema imprevisto: {e}"
+            )
+            logger.exception(mensaje)
+            return None, "Error carpeta"
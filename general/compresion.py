@@ -0,0 +1,81 @@
+import bz2
+import gzip
+import lzma
+from typing import IO
+
+# Extensión de compresión -> módulo que la lee y escribe en streaming
+_FORMATOS = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+EXTENSIONES = tuple(_FORMATOS)
+
+
+def extension_compresion(ruta: str) -> str:
+    """Devuelve la extensión de compresión de la ruta, o None si no la tiene"""
+    for extension in EXTENSIONES:
+        if ruta.endswith(extension):
+            return extension
+    return None
+
+
+def abrir(
+    ruta: str,
+    modo: str = "rt",
+    nivel: int = None,
+    encoding: str = None,
+    newline: str = None,
+) -> IO:
+    """Abre un archivo, comprimido o no según su extensión, con la misma interfaz que
+    open. En modo 'a' los formatos comprimidos agregan un miembro nuevo al final sin
+    tocar los anteriores; gzip, bz2 y xz leen todos los miembros como un solo archivo
+
+    Args:
+        ruta (str): Ruta del archivo
+        modo (str): Modo de apertura, por ejemplo 'rt', 'wt', 'at' o 'rb'
+        nivel (int): Nivel de compresión de 0 (rápido) a 9 (más pequeño), solo al
+            escribir; None para el de cada formato. bz2 usa como mínimo 1
+        encoding (str): Codificación en modo texto
+        newline (str): Manejo de saltos de línea en modo texto, como en open
+
+    Returns:
+        IO: Archivo abierto
+    """
+    formato = _FORMATOS.get(extension_compresion(ruta))
+    texto = {}
+    if "b" not in modo:
+        texto = {"encoding": encoding, "newline": newline}
+        if "t" not in modo:
+            modo += "t"
+    if formato is None:
+        return open(ruta, modo, **texto)
+    if nivel is None or modo.startswith("r"):
+        return formato.open(ruta, modo, **texto)
+    if formato is lzma:
+        return lzma.open(ruta, modo, preset=nivel, **texto)
+    if formato is bz2:
+        nivel = max(1, nivel)
+    return formato.open(ruta, modo, compresslevel=nivel, **texto)
+
+
+def comprimir(ruta: str, datos: bytes, nivel: int = None) -> bytes:
+    """Comprime los datos como un miembro completo del formato de la ruta, listo para
+    agregarse al final del archivo con una sola escritura. Si la ruta no está
+    comprimida devuelve los datos sin cambios
+
+    Args:
+        ruta (str): Ruta del archivo al que se agregarán los datos
+        datos (bytes): Datos a comprimir
+        nivel (int): Nivel de compresión de 0 (rápido) a 9 (más pequeño); None para
+            el de cada formato
+
+    Returns:
+        bytes: Datos comprimidos
+    """
+    formato = _FORMATOS.get(extension_compresion(ruta))
+    if formato is None:
+        return datos
+    if nivel is None:
+        return formato.compress(datos)
+    if formato is lzma:
+        return lzma.compress(datos, preset=nivel)
+    if formato is bz2:
+        nivel = max(1, nivel)
+    return formato.compress(datos, nivel)
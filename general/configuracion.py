@@ -0,0 +1,241 @@
+import configparser
+import keyword
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from collections.abc import Callable
+from typing import Any
+
+from .constantes import Constantes
+from .validaciones import Validaciones
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Estado por (ruta, tipos): [snapshot, (mtime_ns, tamaño), última revisión en
+# monotonic]
+_cache: dict[tuple, list] = {}
+_candado = threading.Lock()
+
+# Textos que se aceptan como booleanos
+_BOOLEANOS = {
+    "true": True,
+    "yes": True,
+    "on": True,
+    "false": False,
+    "no": False,
+    "off": False,
+}
+
+
+class Configuracion:
+    """Una clase que contiene métodos para leer el config.ini del proyecto como una
+    foto inmutable, que se recarga cuando cambia el archivo
+    """
+
+    # Ruta por defecto del archivo de configuración
+    ruta_config = f"{Constantes.ruta_principal.value}/config.ini"
+    # Segundos mínimos entre revisiones del mtime del archivo
+    intervalo_revision = 5.0
+    # Prefijo de las variables de entorno que sobrescriben valores, con el formato
+    # UTILS__SECCION__CLAVE=valor
+    prefijo_entorno = "UTILS"
+
+    @staticmethod
+    def obtener(
+        ruta_config: str = None,
+        intervalo: float = None,
+        tipos: dict[str, dict[str, Callable]] = None,
+        credenciales: dict = {},
+    ) -> tuple[Any, str]:
+        """Devuelve la foto de la configuración. Las secciones y claves se leen como
+        atributos, por ejemplo `config.bd.puerto`. Los valores quedan como str, tal
+        como están en el archivo, salvo los que tienen tipo en `tipos`, que se
+        convierten una sola vez al leer el archivo; los bool aceptan true/false,
+        yes/no y on/off. Si un valor no se puede convertir se sigue sirviendo la foto
+        anterior. Las secciones y claves que no sirven como atributo, por ejemplo
+        'from', '2fa' o '_privado', se omiten con una advertencia en el log. El
+        archivo solo se vuelve a leer si cambió su mtime, y esto se revisa como
+        máximo una vez cada `intervalo` segundos
+
+        Args:
+            ruta_config (str): Ruta del archivo ini, debe ser absoluta. Por defecto
+                config.ini en la ruta principal del proyecto
+            intervalo (float): Segundos entre revisiones del archivo, 0 para revisar
+                siempre. Por defecto `Configuracion.intervalo_revision`
+            tipos (dict[str, dict[str, Callable]]): Tipo o función de conversión por
+                sección y clave, con los nombres de atributo, por ejemplo
+                {'bd': {'puerto': int, 'debug': bool}}. Las funciones forman parte de
+                la llave del caché, así que deben ser las mismas en cada llamada
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[Any, str]: Foto de la configuración y mensaje de error
+        """
+        ruta = ruta_config or Configuracion.ruta_config
+        if intervalo is None:
+            intervalo = Configuracion.intervalo_revision
+        # Cada combinación de ruta y tipos tiene su propia foto
+        llave = (ruta, _firma_tipos(tipos))
+        # Camino rápido: la foto sigue vigente y no toca el disco
+        entrada = _cache.get(llave)
+        if entrada is not None and time.monotonic() - entrada[2] < intervalo:
+            return entrada[0], None
+        # Validar que 'ruta' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta, credenciales)
+        if not res:
+            return None, msj
+        with _candado:
+            entrada = _cache.get(llave)
+            # Otro hilo pudo haberla revisado mientras se esperaba el candado
+            if entrada is not None and time.monotonic() - entrada[2] < intervalo:
+                return entrada[0], None
+            try:
+                stat = os.stat(ruta)
+                firma = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                firma = None
+            if entrada is not None and entrada[1] == firma:
+                entrada[2] = time.monotonic()
+                return entrada[0], None
+            # El archivo es nuevo o cambió, se vuelve a leer
+            try:
+                snapshot = Configuracion._leer(ruta, firma is not None, tipos or {})
+            except Exception as e:
+                mensaje = f"No se cargó {ruta}, problema imprevisto: {e}"
+                logger.exception(mensaje)
+                # Se sigue sirviendo la foto anterior, si existe, hasta que el archivo
+                # se corrija
+                if entrada is None:
+                    return None, "Error configuracion"
+                entrada[2] = time.monotonic()
+                return entrada[0], "Error configuracion"
+            _cache[llave] = [snapshot, firma, time.monotonic()]
+            mensaje = f"Configuración cargada: {ruta}"
+            logger.info(mensaje)
+            return snapshot, None
+
+    @staticmethod
+    def _leer(ruta: str, existe: bool, tipos: dict[str, dict[str, Callable]]) -> Any:
+        """Lee el archivo, aplica las variables de entorno, convierte los valores con
+        tipo y arma la foto inmutable
+        """
+        parser = configparser.ConfigParser(interpolation=None)
+        if existe:
+            with open(ruta, encoding=Constantes.encoding.value) as f:
+                parser.read_file(f)
+        else:
+            mensaje = f"No existe el archivo de configuración: {ruta}"
+            logger.warning(mensaje)
+        secciones = {s: dict(parser.items(s)) for s in parser.sections()}
+        # Aplicar las variables de entorno UTILS__SECCION__CLAVE
+        prefijo = f"{Configuracion.prefijo_entorno}__"
+        for variable, valor in os.environ.items():
+            if not variable.startswith(prefijo):
+                continue
+            partes = variable[len(prefijo) :].split("__")
+            if len(partes) != 2 or not all(partes):
+                continue
+            seccion, clave = partes
+            # Las secciones del archivo se respetan sin importar mayúsculas
+            seccion = next(
+                (s for s in secciones if s.lower() == seccion.lower()), seccion.lower()
+            )
+            secciones.setdefault(seccion, {})[clave.lower()] = valor
+        campos = {}
+        for seccion, valores in secciones.items():
+            nombre = _identificador(seccion, ruta, campos)
+            if nombre is None:
+                continue
+            claves, tipos_seccion = {}, tipos.get(nombre, {})
+            for clave, valor in valores.items():
+                atributo = _identificador(f"{seccion}.{clave}", ruta, claves, clave)
+                if atributo is None:
+                    continue
+                if atributo in tipos_seccion:
+                    valor = _convertir(valor, tipos_seccion[atributo], seccion, clave)
+                claves[atributo] = valor
+            campos[nombre] = namedtuple("Seccion", list(claves))(*claves.values())
+        return namedtuple("Config", list(campos))(*campos.values())
+
+    @staticmethod
+    def valor(
+        seccion: str,
+        clave: str,
+        tipo: type = str,
+        defecto: Any = None,
+        ruta_config: str = None,
+        credenciales: dict = {},
+    ) -> tuple[Any, str]:
+        """Devuelve un valor de la configuración convertido al tipo pedido. Convierte
+        en cada llamada; para leer valores seguido conviene pasar `tipos` a
+        Configuracion.obtener y leerlos como atributos
+
+        Args:
+            seccion (str): Nombre de la sección, como atributo de la foto
+            clave (str): Nombre de la clave, como atributo de la sección
+            tipo (type): str, int, float o bool
+            defecto (Any): Valor si la sección o la clave no existen
+            ruta_config (str): Ruta del archivo ini; None para la de obtener
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[Any, str]: Valor convertido y mensaje de error
+        """
+        config, msj = Configuracion.obtener(ruta_config, credenciales=credenciales)
+        if config is None:
+            return None, msj
+        texto = getattr(getattr(config, seccion, None), clave, None)
+        if texto is None:
+            return defecto, None
+        # Intenta convertir el valor
+        try:
+            return _convertir(texto, tipo, seccion, clave), None
+        except ValueError as e:
+            logger.error(str(e))
+            return None, "Error configuracion"
+
+
+def _convertir(texto: Any, tipo: Callable, seccion: str, clave: str) -> Any:
+    """Convierte el texto de un valor con un tipo o una función. Si no se puede lanza
+    ValueError indicando la clave
+    """
+    if not isinstance(texto, str) or tipo is str:
+        return texto
+    try:
+        if tipo is bool:
+            return _BOOLEANOS[texto.strip().lower()]
+        return tipo(texto.strip())
+    except (KeyError, ValueError, TypeError) as e:
+        nombre = getattr(tipo, "__name__", repr(tipo))
+        raise ValueError(f"El valor de {seccion}.{clave} no es {nombre}: {e}") from e
+
+
+def _firma_tipos(tipos: dict[str, dict[str, Callable]]) -> tuple:
+    """Convierte los tipos en una llave hashable para el caché de fotos. No se ordena
+    para no encarecer el camino rápido; el mismo dict da siempre la misma llave
+    """
+    if not tipos:
+        return ()
+    return tuple((seccion, tuple(claves.items())) for seccion, claves in tipos.items())
+
+
+def _identificador(nombre: str, ruta: str, usados: dict, original: str = None) -> str:
+    """Convierte un nombre de sección o clave en un nombre de atributo válido. Si no
+    se puede, o choca con otro ya usado, lo informa y devuelve None
+    """
+    atributo = re.sub(r"\W", "_", (original or nombre).strip())
+    if (
+        not atributo.isidentifier()
+        or keyword.iskeyword(atributo)
+        or atributo.startswith("_")
+        or atributo in usados
+    ):
+        mensaje = f"Se omite '{nombre}' de {ruta}, no sirve como atributo"
+        logger.warning(mensaje)
+        return None
+    return atributo
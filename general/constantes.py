@@ -1,8 +1,77 @@
 import configparser
 import os
+import threading
 from enum import Enum, unique
 
 
+class _ConfigDiferida(configparser.ConfigParser):
+    """ConfigParser que lee su archivo recién en la primera consulta, así importar
+    Constantes no toca el disco
+    """
+
+    def __init__(self, ruta_config: str) -> None:
+        super().__init__()
+        self._ruta_config = ruta_config
+        self._leido = False
+        # Mientras un hilo lee el archivo los demás esperan; '_leyendo' evita que los
+        # métodos que llame read desde el mismo hilo vuelvan a leerlo
+        self._candado = threading.RLock()
+        self._leyendo = False
+
+    def _leer(self) -> None:
+        if self._leido:
+            return
+        with self._candado:
+            if self._leido or self._leyendo:
+                return
+            self._leyendo = True
+            try:
+                self.read(self._ruta_config)
+            finally:
+                self._leyendo = False
+            self._leido = True
+
+    def sections(self):
+        self._leer()
+        return super().sections()
+
+    def has_section(self, section):
+        self._leer()
+        return super().has_section(section)
+
+    def options(self, section):
+        self._leer()
+        return super().options(section)
+
+    def has_option(self, section, option):
+        self._leer()
+        return super().has_option(section, option)
+
+    def get(self, section, option, **kwargs):
+        self._leer()
+        return super().get(section, option, **kwargs)
+
+    def items(self, *args, **kwargs):
+        self._leer()
+        return super().items(*args, **kwargs)
+
+    def __getitem__(self, key):
+        self._leer()
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self._leer()
+        return super().__contains__(key)
+
+    def __iter__(self):
+        self._leer()
+        return super().__iter__()
+
+    def __len__(self):
+        self._leer()
+        return super().__len__()
+
+
 @unique
 class Constantes(Enum):
     """Una clase que contiene constantes base del sistema, así como la ruta principal y
@@ -24,6 +93,6 @@ class Constantes(Enum):
     ruta_tests = f"{ruta_principal}/tests"
     ruta_tmp = f"{ruta_principal}/tmp"
 
-    # Cargar config.ini
-    config = configparser.ConfigParser()
-    config.read("config.ini")
+    # Cargar config.ini, se lee en la primera consulta y no al importar. Para leer la
+    # configuración en caliente usar Configuracion.obtener
+    config = _ConfigDiferida("config.ini")
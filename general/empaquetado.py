@@ -0,0 +1,331 @@
+import logging
+import os
+import struct
+import tarfile
+import time
+import zlib
+from collections import deque
+from collections.abc import Iterator
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Historia de deflate: cada bloque se comprime con los últimos 32 KiB del anterior
+# como diccionario, así cortar en bloques casi no empeora la compresión
+_HISTORIA = 32 * 1024
+_MAX32 = 0xFFFFFFFF
+# Archivos desde este tamaño se escriben con extensiones zip64; se deja margen porque
+# deflate puede crecer un poco con datos que no se comprimen
+_LIMITE_ZIP64 = _MAX32 - (1 << 24)
+
+
+def _comprimir_bloque(
+    datos: bytes, nivel: int, diccionario: bytes, final: bool
+) -> bytes:
+    """Comprime un bloque como parte de un flujo deflate. Los bloques intermedios
+    terminan en un límite de byte con Z_SYNC_FLUSH para poder concatenarse
+    """
+    if diccionario:
+        compresor = zlib.compressobj(nivel, zlib.DEFLATED, -15, zdict=diccionario)
+    else:
+        compresor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+    return compresor.compress(datos) + compresor.flush(
+        zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+    )
+
+
+def _en_orden(piezas: Iterator[tuple], nivel: int, max_hilos: int) -> Iterator[tuple]:
+    """Comprime en un pool de hilos las piezas ('bloque', datos, diccionario, final) y
+    devuelve todas las piezas en el orden original, con los bloques convertidos en
+    ('comprimido', bytes). Como máximo hay 2 * max_hilos bloques en memoria
+    """
+    # concurrent.futures se importa recién aquí para no cargarlo al importar Carpeta
+    from concurrent.futures import ThreadPoolExecutor
+
+    ventana = 2 * max_hilos
+    pendientes, bloques = deque(), 0
+    pool = ThreadPoolExecutor(max_workers=max_hilos)
+    try:
+        for pieza in piezas:
+            if pieza[0] == "bloque":
+                futuro = pool.submit(_comprimir_bloque, pieza[1], nivel, *pieza[2:])
+                pieza = ("comprimido", futuro)
+                bloques += 1
+            pendientes.append(pieza)
+            while bloques >= ventana:
+                pieza = pendientes.popleft()
+                if pieza[0] == "comprimido":
+                    bloques -= 1
+                    pieza = ("comprimido", pieza[1].result())
+                yield pieza
+        while pendientes:
+            pieza = pendientes.popleft()
+            if pieza[0] == "comprimido":
+                pieza = ("comprimido", pieza[1].result())
+            yield pieza
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _bloques(f, tamano: int, tamano_bloque: int) -> Iterator[tuple]:
+    """Lee 'tamano' bytes de un archivo en piezas ('bloque', ...). Si el archivo se
+    achicó mientras se leía se completa con ceros
+    """
+    anterior, leidos = b"", 0
+    while True:
+        datos = f.read(min(tamano_bloque, tamano - leidos))
+        if len(datos) < min(tamano_bloque, tamano - leidos):
+            mensaje = f"El archivo cambió mientras se empaquetaba: {f.name}"
+            logger.error(mensaje)
+            datos += bytes(min(tamano_bloque, tamano - leidos) - len(datos))
+        leidos += len(datos)
+        final = leidos >= tamano
+        yield ("bloque", datos, anterior[-_HISTORIA:], final)
+        if final:
+            return
+        anterior = datos
+
+
+class _Miembro:
+    """Datos de un archivo dentro del zip para sus cabeceras"""
+
+    def __init__(self, nombre: str, stat: os.stat_result, offset: int) -> None:
+        self.nombre = nombre.encode("utf-8")
+        self.tamano = stat.st_size
+        self.modo = stat.st_mode
+        self.offset = offset
+        self.crc = 0
+        self.comprimido = 0
+        self.zip64 = stat.st_size >= _LIMITE_ZIP64
+        # Fecha y hora en formato MS-DOS, que no admite años antes de 1980
+        t = time.localtime(max(stat.st_mtime, 315532800))
+        self.hora = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        self.fecha = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+    @property
+    def version(self) -> int:
+        return 45 if self.zip64 or self.offset > _MAX32 else 20
+
+    def cabecera_local(self) -> bytes:
+        # Bit 3: el CRC y los tamaños van en el descriptor después de los datos.
+        # Bit 11: el nombre está en UTF-8
+        tamanos, extra = 0, b""
+        if self.zip64:
+            tamanos, extra = _MAX32, struct.pack("<HHQQ", 1, 16, 0, 0)
+        return (
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                self.version,
+                0x0808,
+                8,
+                self.hora,
+                self.fecha,
+                0,
+                tamanos,
+                tamanos,
+                len(self.nombre),
+                len(extra),
+            )
+            + self.nombre
+            + extra
+        )
+
+    def descriptor(self) -> bytes:
+        if self.zip64:
+            return struct.pack(
+                "<IIQQ", 0x08074B50, self.crc, self.comprimido, self.tamano
+            )
+        if self.comprimido > _MAX32 or self.tamano > _MAX32:
+            raise ValueError(f"El archivo creció más de 4 GiB: {self.nombre!r}")
+        return struct.pack("<IIII", 0x08074B50, self.crc, self.comprimido, self.tamano)
+
+    def cabecera_central(self) -> bytes:
+        comprimido, tamano, offset, extra = (
+            self.comprimido,
+            self.tamano,
+            self.offset,
+            b"",
+        )
+        if self.version == 45:
+            comprimido = tamano = offset = _MAX32
+            extra = struct.pack(
+                "<HHQQQ", 1, 24, self.tamano, self.comprimido, self.offset
+            )
+        return (
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                (3 << 8) | self.version,
+                self.version,
+                0x0808,
+                8,
+                self.hora,
+                self.fecha,
+                self.crc,
+                comprimido,
+                tamano,
+                len(self.nombre),
+                len(extra),
+                0,
+                0,
+                0,
+                (self.modo & 0xFFFF) << 16,
+                offset,
+            )
+            + self.nombre
+            + extra
+        )
+
+
+def _piezas_zip(archivos: list[tuple[str, str]], tamano_bloque: int) -> Iterator:
+    for ruta, nombre in archivos:
+        try:
+            f = open(ruta, "rb")
+        except OSError as e:
+            mensaje = f"Se omite {ruta}, no se pudo abrir: {e}"
+            logger.error(mensaje)
+            continue
+        with f:
+            stat = os.fstat(f.fileno())
+            yield ("inicio", nombre, stat)
+            crc = 0
+            for pieza in _bloques(f, stat.st_size, tamano_bloque):
+                crc = zlib.crc32(pieza[1], crc)
+                yield pieza
+            yield ("fin", crc)
+
+
+def _piezas_tar_gz(archivos: list[tuple[str, str]], tamano_bloque: int) -> Iterator:
+    # Cabecera gzip: sin nombre de archivo, sistema operativo desconocido
+    yield ("dato", struct.pack("<BBBBIBB", 0x1F, 0x8B, 8, 0, int(time.time()), 0, 255))
+    pendiente, anterior = bytearray(), b""
+    crc, total = 0, 0
+
+    def cortar(final: bool) -> Iterator[tuple]:
+        nonlocal anterior, crc, total
+        while len(pendiente) >= tamano_bloque or final:
+            datos = bytes(pendiente[:tamano_bloque])
+            del pendiente[:tamano_bloque]
+            crc = zlib.crc32(datos, crc)
+            total += len(datos)
+            ultimo = final and not pendiente
+            yield ("bloque", datos, anterior[-_HISTORIA:], ultimo)
+            anterior = datos
+            if ultimo:
+                return
+
+    for ruta, nombre in archivos:
+        try:
+            f = open(ruta, "rb")
+        except OSError as e:
+            mensaje = f"Se omite {ruta}, no se pudo abrir: {e}"
+            logger.error(mensaje)
+            continue
+        with f:
+            stat = os.fstat(f.fileno())
+            info = tarfile.TarInfo(nombre)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            info.mode = stat.st_mode & 0o7777
+            pendiente += info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            if info.size:
+                for pieza in _bloques(f, info.size, tamano_bloque):
+                    pendiente += pieza[1]
+                    yield from cortar(False)
+            # Los datos de cada archivo se completan a bloques de 512 bytes
+            pendiente += bytes(-info.size % tarfile.BLOCKSIZE)
+    # Fin del tar: dos bloques vacíos y relleno hasta un registro completo
+    pendiente += bytes(2 * tarfile.BLOCKSIZE)
+    pendiente += bytes(-(total + len(pendiente)) % tarfile.RECORDSIZE)
+    yield from cortar(True)
+    yield ("dato", struct.pack("<II", crc, total & _MAX32))
+
+
+def _agrupar(partes: Iterator[bytes], tamano_bloque: int) -> Iterator[bytes]:
+    """Junta las partes pequeñas, como las cabeceras, en trozos de al menos
+    'tamano_bloque' bytes
+    """
+    salida = bytearray()
+    for parte in partes:
+        salida += parte
+        if len(salida) >= tamano_bloque:
+            yield bytes(salida)
+            salida.clear()
+    if salida:
+        yield bytes(salida)
+
+
+def generar_zip(
+    archivos: list[tuple[str, str]], nivel: int, max_hilos: int, tamano_bloque: int
+) -> Iterator[bytes]:
+    """Genera un zip con los archivos (ruta, nombre dentro del zip), comprimiendo con
+    deflate en paralelo
+    """
+
+    def partes() -> Iterator[bytes]:
+        posicion, miembros, miembro = 0, [], None
+        for pieza in _en_orden(_piezas_zip(archivos, tamano_bloque), nivel, max_hilos):
+            if pieza[0] == "inicio":
+                miembro = _Miembro(pieza[1], pieza[2], posicion)
+                datos = miembro.cabecera_local()
+            elif pieza[0] == "comprimido":
+                datos = pieza[1]
+                miembro.comprimido += len(datos)
+            else:
+                miembro.crc = pieza[1]
+                datos = miembro.descriptor()
+                miembros.append(miembro)
+            posicion += len(datos)
+            yield datos
+        # Directorio central y fin del zip, con los registros zip64 si hacen falta
+        inicio_central = posicion
+        for miembro in miembros:
+            datos = miembro.cabecera_central()
+            posicion += len(datos)
+            yield datos
+        tamano_central = posicion - inicio_central
+        cantidad = len(miembros)
+        if cantidad > 0xFFFF or max(inicio_central, tamano_central) > _MAX32:
+            yield struct.pack(
+                "<IQHHIIQQQQ",
+                0x06064B50,
+                44,
+                45,
+                45,
+                0,
+                0,
+                cantidad,
+                cantidad,
+                tamano_central,
+                inicio_central,
+            )
+            yield struct.pack("<IIQI", 0x07064B50, 0, posicion, 1)
+        yield struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(cantidad, 0xFFFF),
+            min(cantidad, 0xFFFF),
+            min(tamano_central, _MAX32),
+            min(inicio_central, _MAX32),
+            0,
+        )
+
+    return _agrupar(partes(), tamano_bloque)
+
+
+def generar_tar_gz(
+    archivos: list[tuple[str, str]], nivel: int, max_hilos: int, tamano_bloque: int
+) -> Iterator[bytes]:
+    """Genera un tar.gz con los archivos (ruta, nombre dentro del tar), comprimiendo
+    el flujo del tar en bloques en paralelo
+    """
+    piezas = _en_orden(_piezas_tar_gz(archivos, tamano_bloque), nivel, max_hilos)
+    return _agrupar((pieza[1] for pieza in piezas), tamano_bloque)
+
+
+# Formato -> generador del archivo comprimido
+FORMATOS = {"zip": generar_zip, "tar.gz": generar_tar_gz}
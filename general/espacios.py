@@ -0,0 +1,422 @@
+import contextlib
+import itertools
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from collections.abc import Iterator
+
+try:
+    import fcntl
+except ImportError:
+    # En Windows varios procesos pueden limpiar a la vez; los errores se ignoran
+    fcntl = None
+
+from .configuracion import Configuracion
+from .constantes import Constantes
+from .metricas import Metricas
+from .validaciones import Validaciones
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Los espacios se nombran <host>-<pid>-<secuencia> para reconocer los que dejó un
+# proceso que murió sin devolverlos
+_HOST = socket.gethostname()
+_secuencia = itertools.count()
+_candado = threading.Lock()
+# Carpeta raíz de los espacios, se resuelve la primera vez que se usa
+_raiz: str = None
+# Espacios libres conocidos por este proceso, para no listar la carpeta en cada uso
+_libres: list[str] = []
+# Bytes de cada espacio en la papelera, que ya no cambia
+_tamanos: dict[str, int] = {}
+# Espacios de la papelera que no se pudieron vaciar, para informarlo una sola vez
+_sin_vaciar: set[str] = set()
+_detener = threading.Event()
+_hilo: threading.Thread = None
+# Tipos de sistema de archivos que viven en memoria
+_TIPOS_MEMORIA = ("tmpfs", "ramfs")
+
+
+def _en_memoria(ruta: str) -> bool:
+    """Indica si la ruta está en un sistema de archivos en memoria, según
+    /proc/mounts
+    """
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            montajes = [linea.split()[1:3] for linea in f]
+    except OSError:
+        return False
+    ruta = os.path.realpath(ruta)
+    tipo, largo = None, -1
+    for punto, tipo_punto in montajes:
+        punto = punto.replace("\\040", " ")
+        dentro = ruta == punto or ruta.startswith(punto.rstrip("/") + "/")
+        if dentro and len(punto) > largo:
+            tipo, largo = tipo_punto, len(punto)
+    return tipo in _TIPOS_MEMORIA
+
+
+def _resolver_raiz() -> str:
+    """Elige la carpeta base: la de tmpfs configurada si está disponible, si no
+    Constantes.ruta_tmp
+    """
+    ruta_tmpfs = Espacios.ruta_tmpfs
+    if ruta_tmpfs is None:
+        config, _ = Configuracion.obtener()
+        seccion = getattr(config, Espacios.seccion_config, None)
+        ruta_tmpfs = getattr(seccion, "ruta_tmpfs", None)
+    base = Constantes.ruta_tmp.value
+    if ruta_tmpfs:
+        try:
+            os.makedirs(ruta_tmpfs, exist_ok=True)
+            disponible = _en_memoria(ruta_tmpfs) and os.access(ruta_tmpfs, os.W_OK)
+        except OSError:
+            disponible = False
+        if disponible:
+            base = ruta_tmpfs
+        else:
+            mensaje = f"No hay tmpfs en {ruta_tmpfs}, se usa {base}"
+            logger.warning(mensaje)
+    raiz = os.path.join(base, "espacios")
+    for carpeta in ("activos", "libres", "papelera"):
+        os.makedirs(os.path.join(raiz, carpeta), exist_ok=True)
+    return raiz
+
+
+def _preparar() -> str:
+    """Resuelve la raíz y arranca el limpiador la primera vez"""
+    global _raiz, _hilo
+    if _raiz is None or _hilo is None:
+        with _candado:
+            if _raiz is None:
+                _raiz = _resolver_raiz()
+            if _hilo is None:
+                _detener.clear()
+                _hilo = threading.Thread(
+                    target=_ciclo, name="utils-espacios", daemon=True
+                )
+                _hilo.start()
+    return _raiz
+
+
+def _vive(nombre: str) -> bool:
+    """Indica si el proceso dueño de un espacio sigue vivo. Los espacios de otro host
+    o de sistemas sin señales se consideran vivos
+    """
+    partes = nombre.rsplit("-", 2)
+    if len(partes) != 3 or partes[0] != _HOST or os.name != "posix":
+        return True
+    try:
+        os.kill(int(partes[1]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def _medir(ruta: str) -> int:
+    """Suma los bytes de los archivos dentro de una carpeta"""
+    total = 0
+    for carpeta, _, archivos in os.walk(ruta):
+        for archivo in archivos:
+            with contextlib.suppress(OSError):
+                total += os.lstat(os.path.join(carpeta, archivo)).st_size
+    return total
+
+
+def _vaciar(ruta: str) -> bool:
+    """Borra el contenido de una carpeta. Lo que no se puede borrar, por ejemplo una
+    subcarpeta de solo lectura, se deja sin cortar la pasada
+
+    Returns:
+        bool: True si la carpeta quedó vacía
+    """
+    with os.scandir(ruta) as entradas:
+        for entrada in entradas:
+            if entrada.is_dir(follow_symlinks=False):
+                shutil.rmtree(entrada.path, ignore_errors=True)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(entrada.path)
+    return not os.listdir(ruta)
+
+
+def _limpiar(forzar: bool) -> int:
+    """Una pasada del limpiador. Manda a la papelera los espacios de procesos muertos,
+    vacía los de la papelera que superan la edad o el tamaño máximos y los recicla
+    como libres hasta completar el máximo de libres
+
+    Returns:
+        int: Espacios vaciados
+    """
+    raiz = _preparar()
+    activos, libres, papelera = (
+        os.path.join(raiz, c) for c in ("activos", "libres", "papelera")
+    )
+    fd = os.open(os.path.join(raiz, ".limpieza"), os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        if fcntl is not None:
+            try:
+                # Solo un proceso limpia a la vez; si otro ya lo hace no se espera
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if forzar else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return 0
+        # Espacios que dejó un proceso que murió sin devolverlos
+        for nombre in os.listdir(activos):
+            if not _vive(nombre):
+                with contextlib.suppress(OSError):
+                    os.rename(
+                        os.path.join(activos, nombre),
+                        os.path.join(papelera, f"{time.time_ns()}-{nombre}"),
+                    )
+        # Papelera, de la entrada más antigua a la más nueva
+        ahora = time.time_ns()
+        entradas = []
+        nombres = os.listdir(papelera)
+        # Se olvidan los tamaños de lo que ya vació otro proceso
+        for nombre in set(_tamanos).difference(nombres):
+            del _tamanos[nombre]
+        _sin_vaciar.intersection_update(nombres)
+        for nombre in nombres:
+            try:
+                edad = (ahora - int(nombre.split("-", 1)[0])) / 1e9
+            except ValueError:
+                edad = float("inf")
+            if nombre not in _tamanos:
+                _tamanos[nombre] = _medir(os.path.join(papelera, nombre))
+            entradas.append((edad, nombre))
+        entradas.sort(reverse=True)
+        total = sum(_tamanos[nombre] for _, nombre in entradas)
+        cantidad_libres = len(os.listdir(libres))
+        vaciados = 0
+        for edad, nombre in entradas:
+            if not (
+                forzar or edad >= Espacios.edad_maxima or total > Espacios.tamano_maximo
+            ):
+                break
+            ruta = os.path.join(papelera, nombre)
+            # Un espacio que no quedó vacío no se recicla, para que otro trabajo no
+            # reciba sus archivos; queda en la papelera y se reintenta en otra pasada
+            try:
+                vacio = _vaciar(ruta)
+            except OSError as e:
+                vacio, error = False, e
+            else:
+                error = "quedaron archivos que no se pudieron borrar"
+            if not vacio:
+                if nombre not in _sin_vaciar:
+                    _sin_vaciar.add(nombre)
+                    mensaje = f"No se pudo vaciar {ruta}, queda en la papelera: {error}"
+                    logger.error(mensaje)
+                continue
+            try:
+                if cantidad_libres < Espacios.max_libres:
+                    destino = nombre.split("-", 1)[1]
+                    os.rename(ruta, os.path.join(libres, destino))
+                    cantidad_libres += 1
+                else:
+                    os.rmdir(ruta)
+            except OSError as e:
+                mensaje = f"No se pudo quitar {ruta} de la papelera: {e}"
+                logger.error(mensaje)
+                continue
+            _sin_vaciar.discard(nombre)
+            total -= _tamanos.pop(nombre)
+            vaciados += 1
+        # Libres que sobran
+        for nombre in os.listdir(libres)[Espacios.max_libres :]:
+            with contextlib.suppress(OSError):
+                os.rmdir(os.path.join(libres, nombre))
+        return vaciados
+    finally:
+        os.close(fd)
+
+
+def _ciclo() -> None:
+    while not _detener.wait(Espacios.intervalo_limpieza):
+        try:
+            _limpiar(False)
+        except Exception as e:
+            mensaje = f"Falló la limpieza de espacios, problema imprevisto: {e}"
+            logger.exception(mensaje)
+
+
+def _reiniciar_en_hijo() -> None:
+    """Tras un fork el hilo limpiador no existe en el hijo y los candados pueden haber
+    quedado tomados
+    """
+    global _candado, _hilo, _detener
+    _candado = threading.Lock()
+    _detener = threading.Event()
+    _hilo = None
+    _libres.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_en_hijo)
+
+
+class Espacios:
+    """Una clase que contiene métodos para obtener carpetas temporales de trabajo bajo
+    Constantes.ruta_tmp, o en tmpfs si se configura. Las carpetas devueltas vacías se
+    reutilizan y las que tienen archivos se mueven a una papelera que un hilo de fondo
+    vacía después, así ni tomar ni devolver un espacio espera a makedirs o rmtree
+    """
+
+    # Sección del config.ini con la clave ruta_tmpfs, por ejemplo:
+    # [espacios]
+    # ruta_tmpfs = /dev/shm/proyecto
+    seccion_config = "espacios"
+    # Ruta en tmpfs que se prefiere a la del config.ini; None para leer el config.ini
+    ruta_tmpfs = None
+    # Máximo de carpetas vacías que se guardan para reutilizar
+    max_libres = 32
+    # Segundos que un espacio puede esperar en la papelera antes de vaciarse
+    edad_maxima = 30.0
+    # Bytes en la papelera desde los que se vacía sin esperar la edad máxima
+    tamano_maximo = 256 * 1024**2
+    # Segundos entre pasadas del limpiador
+    intervalo_limpieza = 1.0
+
+    @staticmethod
+    @Metricas.instrumentar("espacios.tomar")
+    def tomar(credenciales: dict = {}) -> tuple[str, str]:
+        """Entrega una carpeta vacía y exclusiva para un trabajo. Se debe devolver con
+        Espacios.devolver; si el proceso muere sin devolverla, el limpiador la borra
+
+        Args:
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[str, str]: Ruta de la carpeta y mensaje de error
+        """
+        try:
+            raiz = _preparar()
+            nombre = f"{_HOST}-{os.getpid()}-{next(_secuencia)}"
+            ruta = os.path.join(raiz, "activos", nombre)
+            with Metricas.fase("espacios.tomar.disco"):
+                while True:
+                    with _candado:
+                        if not _libres:
+                            _libres.extend(os.listdir(os.path.join(raiz, "libres")))
+                        libre = _libres.pop() if _libres else None
+                    if libre is None:
+                        os.mkdir(ruta)
+                        break
+                    try:
+                        os.rename(os.path.join(raiz, "libres", libre), ruta)
+                        break
+                    except OSError:
+                        # Otro proceso la tomó o el limpiador la borró
+                        continue
+            return ruta, None
+        except Exception as e:
+            mensaje = f"No se obtuvo un espacio de trabajo, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error espacios"
+
+    @staticmethod
+    @Metricas.instrumentar("espacios.devolver")
+    def devolver(ruta_espacio: str, credenciales: dict = {}) -> tuple[str, str]:
+        """Devuelve una carpeta entregada por Espacios.tomar. Si está vacía queda
+        libre para otro trabajo; si no, se mueve a la papelera y se vacía en segundo
+        plano
+
+        Args:
+            ruta_espacio (str): Ruta entregada por Espacios.tomar
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[str, str]: Ruta devuelta y mensaje de error
+        """
+        # Validar que 'ruta_espacio' sea absoluta
+        res, msj = Validaciones.es_ruta_absoluta(ruta_espacio, credenciales)
+        if not res:
+            return None, msj
+        raiz = _preparar()
+        # Validar que 'ruta_espacio' sea un espacio activo
+        carpeta, nombre = os.path.split(os.path.normpath(ruta_espacio))
+        if carpeta != os.path.join(raiz, "activos"):
+            mensaje = f"No es un espacio de trabajo activo: {ruta_espacio}"
+            logger.error(mensaje)
+            return None, "Error espacios"
+        # Validar que 'ruta_espacio' exista
+        res, msj = Validaciones.existe_carpeta(ruta_espacio, credenciales)
+        if not res:
+            return None, msj
+        try:
+            with Metricas.fase("espacios.devolver.disco"):
+                with os.scandir(ruta_espacio) as entradas:
+                    vacia = next(entradas, None) is None
+                if vacia and len(_libres) < Espacios.max_libres:
+                    os.rename(ruta_espacio, os.path.join(raiz, "libres", nombre))
+                    with _candado:
+                        _libres.append(nombre)
+                else:
+                    destino = f"{time.time_ns()}-{nombre}"
+                    os.rename(ruta_espacio, os.path.join(raiz, "papelera", destino))
+            return ruta_espacio, None
+        except Exception as e:
+            mensaje = f"No se devolvió {ruta_espacio}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error espacios"
+
+    @staticmethod
+    @contextlib.contextmanager
+    def usar(credenciales: dict = {}) -> Iterator[str]:
+        """Context manager que toma un espacio y lo devuelve al salir, aunque haya un
+        error. Por ejemplo: `with Espacios.usar() as carpeta:`
+
+        Args:
+            credenciales (dict): Datos a registrar en el log
+
+        Yields:
+            str: Ruta de la carpeta
+        """
+        ruta, msj = Espacios.tomar(credenciales)
+        if msj is not None:
+            raise OSError(f"No se obtuvo un espacio de trabajo: {msj}")
+        try:
+            yield ruta
+        finally:
+            Espacios.devolver(ruta, credenciales)
+
+    @staticmethod
+    @Metricas.instrumentar("espacios.limpiar")
+    def limpiar(forzar: bool = False, credenciales: dict = {}) -> tuple[int, str]:
+        """Hace ahora una pasada del limpiador de fondo
+
+        Args:
+            forzar (bool): Vaciar toda la papelera sin mirar la edad ni el tamaño, y
+                esperar si otro proceso está limpiando
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[int, str]: Espacios vaciados y mensaje de error
+        """
+        try:
+            return _limpiar(forzar), None
+        except Exception as e:
+            mensaje = f"Falló la limpieza de espacios, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error espacios"
+
+    @staticmethod
+    def ubicacion() -> tuple[str, str]:
+        """Devuelve la carpeta donde se crean los espacios
+
+        Returns:
+            tuple[str, str]: Ruta de la carpeta y mensaje de error
+        """
+        try:
+            return _preparar(), None
+        except Exception as e:
+            mensaje = f"No se preparó la carpeta de espacios, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error espacios"
@@ -0,0 +1,281 @@
+import csv
+import io
+import json
+import os
+import threading
+from typing import Any
+
+from .constantes import Constantes
+
+# Índices ya cargados por ruta del csv
+_cache: dict[str, "IndiceCsv"] = {}
+
+
+def serializar(fila: list[Any]) -> bytes:
+    """Convierte una fila en una línea csv codificada"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(fila)
+    return buffer.getvalue().encode(Constantes.encoding.value)
+
+
+def normalizar(valores: list[Any]) -> tuple[str, ...]:
+    """Convierte los valores de una clave al texto con que quedan escritos en el csv"""
+    return tuple("" if v is None else str(v) for v in valores)
+
+
+class IndiceCsv:
+    """Índice de un csv que relaciona cada clave con el rango de bytes de su fila
+    vigente. Se guarda al lado del csv en un archivo .idx de solo agregado: la primera
+    línea es una cabecera JSON con las columnas clave y las siguientes son entradas
+    [clave, inicio, fin]. Si una clave aparece más de una vez vale la última entrada y
+    las filas anteriores quedan como lápidas hasta la compactación
+    """
+
+    def __init__(self, ruta_csv: str, claves: list[str], columnas: list[str]) -> None:
+        self.ruta_csv = ruta_csv
+        self.ruta_idx = f"{ruta_csv}.idx"
+        self.claves = list(claves)
+        self.columnas = list(columnas)
+        self.posiciones = [self.columnas.index(c) for c in self.claves]
+        self.mapa: dict[tuple[str, ...], tuple[int, int]] = {}
+        # Filas con entrada en el índice, vigentes o no
+        self.entradas = 0
+        # Bytes del csv cubiertos por el índice
+        self.fin = 0
+        # Tamaño y mtime del csv y tamaño del .idx cuando se cargó, para detectar
+        # cambios hechos por fuera del índice
+        self.firma = (-1, -1, -1)
+
+    @property
+    def muertos(self) -> int:
+        """Filas del csv reemplazadas por una versión más nueva"""
+        return self.entradas - len(self.mapa)
+
+    @staticmethod
+    def abrir(ruta_csv: str, claves: list[str] = None) -> "IndiceCsv":
+        """Devuelve el índice vigente del csv. Reutiliza el de memoria si el csv y el
+        .idx no cambiaron, si no lee el .idx y, si este falta, no coincide con `claves`
+        o no cubre todo el csv, lo reconstruye recorriendo el csv. Se debe llamar con
+        el candado del csv tomado con anexos.bloquear
+
+        Args:
+            ruta_csv (str): Ruta del csv, debe existir
+            claves (list[str]): Columnas clave; None para usar las del .idx
+
+        Returns:
+            IndiceCsv: Índice del csv
+        """
+        firma = IndiceCsv._firma(ruta_csv)
+        indice = _cache.get(ruta_csv)
+        if indice is not None and indice.firma == firma:
+            if claves is None or indice.claves == list(claves):
+                return indice
+        indice = IndiceCsv._leer_idx(ruta_csv)
+        if indice is None or (claves is not None and indice.claves != list(claves)):
+            if claves is None:
+                if indice is None:
+                    raise ValueError(f"El csv no tiene índice ni claves: {ruta_csv}")
+                claves = indice.claves
+            indice = IndiceCsv.reconstruir(ruta_csv, claves)
+        elif indice.fin != firma[0]:
+            # El csv se modificó por fuera del índice
+            indice = IndiceCsv.reconstruir(ruta_csv, indice.claves)
+        indice.firma = IndiceCsv._firma(ruta_csv)
+        _cache[ruta_csv] = indice
+        return indice
+
+    @staticmethod
+    def crear(ruta_csv: str, claves: list[str], columnas: list[str]) -> "IndiceCsv":
+        """Crea un csv vacío, solo con cabecera, y su índice
+
+        Args:
+            ruta_csv (str): Ruta del csv a crear
+            claves (list[str]): Columnas clave
+            columnas (list[str]): Columnas del csv
+
+        Returns:
+            IndiceCsv: Índice del csv nuevo
+        """
+        indice = IndiceCsv(ruta_csv, claves, columnas)
+        cabecera = serializar(columnas)
+        with open(ruta_csv, "wb") as f:
+            f.write(cabecera)
+        indice.fin = len(cabecera)
+        indice._escribir_idx()
+        indice.firma = IndiceCsv._firma(ruta_csv)
+        _cache[ruta_csv] = indice
+        return indice
+
+    @staticmethod
+    def _firma(ruta_csv: str) -> tuple[int, int, int]:
+        try:
+            tam_idx = os.path.getsize(f"{ruta_csv}.idx")
+        except OSError:
+            tam_idx = -1
+        stat = os.stat(ruta_csv)
+        return stat.st_size, stat.st_mtime_ns, tam_idx
+
+    @staticmethod
+    def _leer_idx(ruta_csv: str) -> "IndiceCsv":
+        try:
+            with open(f"{ruta_csv}.idx", encoding=Constantes.encoding.value) as f:
+                cabecera = json.loads(f.readline())
+                indice = IndiceCsv(ruta_csv, cabecera["claves"], cabecera["columnas"])
+                indice.fin = cabecera["fin"]
+                indice.entradas = cabecera["muertos"]
+                for linea in f:
+                    if not linea.endswith("\n"):
+                        # Entrada incompleta por una escritura interrumpida
+                        return None
+                    clave, inicio, fin = json.loads(linea)
+                    indice.mapa[tuple(clave)] = (inicio, fin)
+                    indice.entradas += 1
+                    indice.fin = max(indice.fin, fin)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return indice
+
+    @staticmethod
+    def reconstruir(ruta_csv: str, claves: list[str]) -> "IndiceCsv":
+        """Recorre el csv una vez, anotando el rango de bytes de cada fila, y reescribe
+        el .idx. Reemplaza el índice que hubiera en memoria
+        """
+        encoding = Constantes.encoding.value
+        with open(ruta_csv, "rb") as f:
+            linea = f.readline()
+            columnas = next(csv.reader([linea.decode(encoding)]))
+            indice = IndiceCsv(ruta_csv, claves, columnas)
+            posicion = len(linea)
+            pendiente, inicio = b"", posicion
+            for linea in f:
+                if not pendiente:
+                    inicio = posicion
+                pendiente += linea
+                posicion += len(linea)
+                if not pendiente.strip():
+                    pendiente = b""
+                    continue
+                # Una cantidad impar de comillas indica un salto de línea en un campo
+                if pendiente.count(b'"') % 2:
+                    continue
+                fila = next(csv.reader([pendiente.decode(encoding)]))
+                indice.mapa[indice.clave_de(fila)] = (inicio, posicion)
+                indice.entradas += 1
+                pendiente = b""
+        indice.fin = posicion
+        indice._escribir_idx()
+        indice.firma = IndiceCsv._firma(ruta_csv)
+        _cache[ruta_csv] = indice
+        return indice
+
+    def clave_de(self, fila: list[Any]) -> tuple[str, ...]:
+        """Extrae la clave normalizada de una fila"""
+        return normalizar([fila[p] for p in self.posiciones])
+
+    def _escribir_idx(self) -> None:
+        """Reescribe el .idx completo con las entradas vigentes. La cabecera guarda
+        cuántas lápidas tiene el csv, para contarlas sin recorrerlo
+        """
+        cabecera = {
+            "claves": self.claves,
+            "columnas": self.columnas,
+            "fin": self.fin,
+            "muertos": self.muertos,
+        }
+        lineas = [json.dumps(cabecera, ensure_ascii=False)]
+        lineas += [
+            json.dumps([list(clave), inicio, fin], ensure_ascii=False)
+            for clave, (inicio, fin) in self.mapa.items()
+        ]
+        # Varios lectores con el candado compartido pueden reconstruir el índice a la
+        # vez; cada uno escribe su propio temporal
+        temporal = f"{self.ruta_idx}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "w", encoding=Constantes.encoding.value) as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(temporal, self.ruta_idx)
+
+    def leer(self, clave: tuple[str, ...]) -> list[str]:
+        """Lee la fila vigente de una clave sin recorrer el csv
+
+        Args:
+            clave (tuple[str, ...]): Clave normalizada
+
+        Returns:
+            list[str]: Valores de la fila, o None si la clave no existe
+        """
+        rango = self.mapa.get(clave)
+        if rango is None:
+            return None
+        with open(self.ruta_csv, "rb") as f:
+            f.seek(rango[0])
+            bruto = f.read(rango[1] - rango[0])
+        return next(csv.reader([bruto.decode(Constantes.encoding.value)]))
+
+    def leer_brutos(self, claves: list[tuple[str, ...]]) -> dict[tuple, bytes]:
+        """Lee los bytes de las filas vigentes de varias claves abriendo el csv una
+        sola vez. Las claves que no existen no aparecen en el resultado
+        """
+        rangos = sorted(
+            (self.mapa[clave], clave) for clave in claves if clave in self.mapa
+        )
+        brutos = {}
+        if rangos:
+            with open(self.ruta_csv, "rb") as f:
+                for (inicio, fin), clave in rangos:
+                    f.seek(inicio)
+                    brutos[clave] = f.read(fin - inicio)
+        return brutos
+
+    def agregar(self, filas: list[tuple[tuple[str, ...], bytes]]) -> None:
+        """Agrega filas al final del csv y sus entradas al .idx en una escritura cada
+        uno. Las claves que ya existían quedan apuntando a la fila nueva
+
+        Args:
+            filas (list[tuple[tuple[str, ...], bytes]]): Clave y línea de cada fila
+        """
+        if not filas:
+            return
+        with open(self.ruta_csv, "a+b") as f:
+            posicion = f.seek(0, os.SEEK_END)
+            # Un csv escrito por fuera puede no terminar en salto de línea
+            separador = b""
+            if posicion:
+                f.seek(posicion - 1)
+                if f.read(1) != b"\n":
+                    separador = b"\n"
+            posicion += len(separador)
+            f.write(separador + b"".join(bruto for _, bruto in filas))
+        entradas = []
+        for clave, bruto in filas:
+            rango = (posicion, posicion + len(bruto))
+            self.mapa[clave] = rango
+            entradas.append(json.dumps([list(clave), *rango], ensure_ascii=False))
+            posicion = rango[1]
+        with open(self.ruta_idx, "a", encoding=Constantes.encoding.value) as f:
+            f.write("\n".join(entradas) + "\n")
+        self.entradas += len(filas)
+        self.fin = posicion
+        self.firma = IndiceCsv._firma(self.ruta_csv)
+
+    def compactar(self) -> None:
+        """Reescribe el csv solo con las filas vigentes, en su orden original, y
+        regenera el .idx
+        """
+        temporal = f"{self.ruta_csv}.tmp"
+        vigentes = sorted(self.mapa.items(), key=lambda item: item[1][0])
+        mapa = {}
+        with open(self.ruta_csv, "rb") as origen, open(temporal, "wb") as destino:
+            cabecera = origen.readline()
+            destino.write(cabecera)
+            posicion = len(cabecera)
+            for clave, (inicio, fin) in vigentes:
+                origen.seek(inicio)
+                destino.write(origen.read(fin - inicio))
+                mapa[clave] = (posicion, posicion + fin - inicio)
+                posicion += fin - inicio
+        os.replace(temporal, self.ruta_csv)
+        self.mapa = mapa
+        self.entradas = len(mapa)
+        self.fin = posicion
+        self._escribir_idx()
+        self.firma = IndiceCsv._firma(self.ruta_csv)
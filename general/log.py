@@ -1,22 +1,35 @@
 import logging
+import threading
 
 from .constantes import Constantes
 
+# Evita configurar el logging más de una vez por proceso
+_configurado = False
+_candado = threading.Lock()
+
 
 def setup_logging() -> None:
     """Setea el mensaje de logging para todos los scripts del utils y también del
-    proyecto
+    proyecto. Se debe llamar de forma explícita al iniciar la aplicación; las
+    llamadas posteriores no hacen nada
     """
-    # Ruta del archivo log
-    archivo_log = f"{Constantes.ruta_log.value}/app.log"
-    # Configuración del logger
-    logging.basicConfig(
-        format="%(asctime)s *|* %(name)s *|* %(levelname)s *|* %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        level=logging.INFO,
-        handlers=[
-            logging.FileHandler(
-                filename=archivo_log, mode="a", encoding=Constantes.encoding.value
-            )
-        ],
-    )
+    global _configurado
+    if _configurado:
+        return
+    with _candado:
+        if _configurado:
+            return
+        # Ruta del archivo log
+        archivo_log = f"{Constantes.ruta_log.value}/app.log"
+        # Configuración del logger
+        logging.basicConfig(
+            format="%(asctime)s *|* %(name)s *|* %(levelname)s *|* %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+            level=logging.INFO,
+            handlers=[
+                logging.FileHandler(
+                    filename=archivo_log, mode="a", encoding=Constantes.encoding.value
+                )
+            ],
+        )
+        _configurado = True
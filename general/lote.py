@@ -0,0 +1,248 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any
+
+from .archivo import Archivo
+from .carpeta import Carpeta
+from .validaciones import Validaciones
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Operación -> (clase que la implementa, pool). Las operaciones que pasan por pandas o
+# docxtpl usan CPU y van a procesos; el resto espera al disco y va a hilos
+_OPERACIONES = {
+    "borrar_archivo": (Archivo, "hilos"),
+    "crear_csv": (Archivo, "procesos"),
+    "actualizar_csv": (Archivo, "procesos"),
+    "crear_txt": (Archivo, "hilos"),
+    "actualizar_txt": (Archivo, "hilos"),
+    "crear_docx": (Archivo, "procesos"),
+    "borrar_carpeta": (Carpeta, "hilos"),
+    "crear_carpeta": (Carpeta, "hilos"),
+}
+_CARPETAS = ("borrar_carpeta", "crear_carpeta")
+# Pools de procesos por max_procesos, reutilizados entre lotes para no pagar en cada
+# llamada el arranque de los procesos ni la importación de pandas
+_pools: dict[int, "ProcessPoolExecutor"] = {}
+_pid_pools = os.getpid()
+_candado_pools = threading.Lock()
+
+
+def _iniciar_proceso() -> None:
+    """Prepara cada proceso del pool una sola vez"""
+    # pandas se importa al crear el proceso y no en la primera operación de cada lote
+    import pandas  # noqa: F401
+
+
+def _pool_procesos(max_procesos: int) -> "ProcessPoolExecutor":
+    """Devuelve el pool de procesos compartido para 'max_procesos', creándolo si no
+    existe. Un proceso hijo no usa los pools heredados del padre
+    """
+    # concurrent.futures se importa recién aquí para no cargar multiprocessing al
+    # importar el paquete
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pid_pools
+    with _candado_pools:
+        if _pid_pools != os.getpid():
+            _pools.clear()
+            _pid_pools = os.getpid()
+        pool = _pools.get(max_procesos)
+        # Un pool que quedó roto en otro lote no acepta tareas nuevas
+        if pool is None or getattr(pool, "_broken", False):
+            pool = ProcessPoolExecutor(
+                max_workers=max_procesos, initializer=_iniciar_proceso
+            )
+            _pools[max_procesos] = pool
+        return pool
+
+
+def _descartar_pool(max_procesos: int, pool: "ProcessPoolExecutor") -> None:
+    """Quita un pool roto, por ejemplo porque murió uno de sus procesos, para que el
+    siguiente lote cree otro
+    """
+    with _candado_pools:
+        if _pools.get(max_procesos) is pool:
+            del _pools[max_procesos]
+    pool.shutdown(wait=False)
+
+
+def _ejecutar_tarea(
+    tarea: list[tuple[int, tuple]], credenciales: dict
+) -> list[list[Any]]:
+    """Ejecuta en orden las operaciones de una tarea. Es una función de módulo para
+    que se pueda enviar a un proceso
+    """
+    filas = []
+    for indice, operacion in tarea:
+        nombre, ruta, *args = operacion
+        clase, _ = _OPERACIONES[nombre]
+        inicio = time.perf_counter()
+        try:
+            res, msj = getattr(clase, nombre)(ruta, *args, credenciales=credenciales)
+        except Exception as e:
+            mensaje = f"Falló la operación {nombre} en {ruta}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            res, msj = None, "Error lote"
+        ms = (time.perf_counter() - inicio) * 1000
+        filas.append([indice, nombre, ruta, res, msj, round(ms, 3)])
+    return filas
+
+
+class Lote:
+    """Una clase que contiene métodos para ejecutar en paralelo listas de operaciones
+    de Archivo y Carpeta, conservando el orden de las que afectan la misma ruta. Los
+    procesos se crean en el primer lote que los necesita y se reutilizan en los
+    siguientes
+    """
+
+    # Columnas de la tabla de resultados, se puede guardar con Archivo.crear_csv
+    columnas = ["indice", "operacion", "ruta", "resultado", "error", "ms"]
+
+    @staticmethod
+    def ejecutar(
+        operaciones: list[tuple],
+        max_hilos: int = None,
+        max_procesos: int = None,
+        tamano_tarea: int = 64,
+        credenciales: dict = {},
+    ) -> tuple[list[list[Any]], dict[str, int]]:
+        """Ejecuta un lote de operaciones. Cada operación es una tupla con el nombre del
+        método y sus argumentos, por ejemplo ('crear_txt', ruta, texto) o
+        ('crear_carpeta', ruta). Las operaciones sobre una misma ruta, o sobre rutas
+        dentro de una carpeta que también se crea o borra en el lote, se ejecutan en el
+        orden de la lista; el resto se ejecuta en paralelo
+
+        Args:
+            operaciones (list[tuple]): Operaciones a ejecutar
+            max_hilos (int): Máximo de hilos, por defecto el de ThreadPoolExecutor
+            max_procesos (int): Máximo de procesos, 0 para ejecutar todo en hilos. Por
+                defecto la cantidad de CPUs
+            tamano_tarea (int): Operaciones que se agrupan en una misma tarea del pool
+                para reducir el costo por llamada
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[list[list[Any]], dict[str, int]]: Tabla de resultados ordenada como
+            `operaciones`, con las columnas de `Lote.columnas`, y cantidad de
+            operaciones por mensaje de error
+        """
+        # Validar que 'operaciones' sea del tipo list
+        res, msj = Validaciones.es_tipo(operaciones, list, credenciales)
+        if not res:
+            return None, {msj: 1}
+        # Validar que 'max_hilos', 'max_procesos' y 'tamano_tarea' sean enteros
+        # positivos; max_procesos también acepta 0 y los máximos None
+        for nombre, valor, minimo in (
+            ("max_hilos", max_hilos, 1),
+            ("max_procesos", max_procesos, 0),
+            ("tamano_tarea", tamano_tarea, 1),
+        ):
+            if valor is None and nombre != "tamano_tarea":
+                continue
+            if isinstance(valor, bool) or not isinstance(valor, int) or valor < minimo:
+                mensaje = f"Valor de {nombre} inválido: {valor!r:.200}"
+                logger.error(mensaje)
+                return None, {"Error validaciones": 1}
+        tabla, validas = [], []
+        for indice, operacion in enumerate(operaciones):
+            # Validar que cada operación sea una tupla con un nombre soportado y ruta
+            res, msj = Validaciones.es_tipos(operacion, (tuple, list), credenciales)
+            if res and (len(operacion) < 2 or operacion[0] not in _OPERACIONES):
+                mensaje = f"Operación no soportada: {operacion!r:.200}"
+                logger.error(mensaje)
+                res, msj = False, "Error validaciones"
+            if res:
+                res, msj = Validaciones.es_ruta_absoluta(operacion[1], credenciales)
+            if not res:
+                nombre = None
+                if isinstance(operacion, (tuple, list)) and operacion:
+                    nombre = operacion[0]
+                tabla.append([indice, nombre, None, None, msj, 0.0])
+                continue
+            validas.append((indice, tuple(operacion)))
+        # Agrupar por ruta, las rutas dentro de una carpeta del lote van con ella
+        carpetas = {os.path.normpath(op[1]) for _, op in validas if op[0] in _CARPETAS}
+        grupos: dict[str, list[tuple[int, tuple]]] = {}
+        for indice, operacion in validas:
+            clave = ruta = os.path.normpath(operacion[1])
+            while True:
+                if ruta in carpetas:
+                    clave = ruta
+                padre = os.path.dirname(ruta)
+                if padre == ruta:
+                    break
+                ruta = padre
+            grupos.setdefault(clave, []).append((indice, operacion))
+        # Empaquetar grupos en tareas de al menos 'tamano_tarea' operaciones, separando
+        # las que van a procesos de las que van a hilos
+        tareas = {"hilos": [], "procesos": []}
+        abiertas = {"hilos": [], "procesos": []}
+        for grupo in grupos.values():
+            pool = "hilos"
+            if max_procesos != 0 and any(
+                _OPERACIONES[op[0]][1] == "procesos" for _, op in grupo
+            ):
+                pool = "procesos"
+            abiertas[pool].extend(grupo)
+            if len(abiertas[pool]) >= tamano_tarea:
+                tareas[pool].append(abiertas[pool])
+                abiertas[pool] = []
+        for pool, tarea in abiertas.items():
+            if tarea:
+                tareas[pool].append(tarea)
+        # concurrent.futures se importa recién aquí para no cargarlo al importar el
+        # paquete
+        from concurrent.futures import ThreadPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        # Ejecutar las tareas en sus pools
+        futuros: list[tuple["Future", list]] = []
+        ejecutores, procesos = [], None
+        try:
+            if tareas["procesos"]:
+                procesos = _pool_procesos(max_procesos)
+                for tarea in tareas["procesos"]:
+                    futuro = procesos.submit(_ejecutar_tarea, tarea, credenciales)
+                    futuros.append((futuro, tarea))
+            if tareas["hilos"]:
+                ejecutor = ThreadPoolExecutor(max_workers=max_hilos)
+                ejecutores.append(ejecutor)
+                for tarea in tareas["hilos"]:
+                    futuro = ejecutor.submit(_ejecutar_tarea, tarea, credenciales)
+                    futuros.append((futuro, tarea))
+            for futuro, tarea in futuros:
+                try:
+                    tabla.extend(futuro.result())
+                except BrokenProcessPool as e:
+                    mensaje = f"Se rompió el pool de procesos del lote: {e}"
+                    logger.exception(mensaje)
+                    _descartar_pool(max_procesos, procesos)
+                    tabla.extend(
+                        [i, op[0], op[1], None, "Error lote", 0.0] for i, op in tarea
+                    )
+                except Exception as e:
+                    mensaje = f"Falló una tarea del lote, problema imprevisto: {e}"
+                    logger.exception(mensaje)
+                    tabla.extend(
+                        [i, op[0], op[1], None, "Error lote", 0.0] for i, op in tarea
+                    )
+        finally:
+            for ejecutor in ejecutores:
+                ejecutor.shutdown(wait=True)
+        tabla.sort(key=lambda fila: fila[0])
+        errores = dict(Counter(fila[4] for fila in tabla if fila[4] is not None))
+        mensaje = (
+            f"Lote ejecutado: {len(tabla)} operaciones, {len(grupos)} rutas, "
+            f"{sum(errores.values())} errores"
+        )
+        logger.info(mensaje)
+        return tabla, errores
@@ -0,0 +1,284 @@
+import contextlib
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Desactivado por defecto; también se activa con la variable de entorno UTILS_METRICAS
+_activo = os.environ.get("UTILS_METRICAS", "").lower() in ("1", "true", "yes", "on")
+_candado = threading.Lock()
+_series: dict[str, "_Serie"] = {}
+# Métodos decorados con Metricas.instrumentar: (función original, envoltura)
+_instrumentadas: list[tuple[Callable, Callable]] = []
+# Contexto vacío que se reutiliza cuando las métricas están desactivadas
+_NULO = contextlib.nullcontext()
+# Cuantiles que se reportan
+_CUANTILES = (0.5, 0.9, 0.99)
+
+
+class _Serie:
+    """Acumulados de un método público o de una fase interna"""
+
+    __slots__ = ("llamadas", "errores", "total_ns", "muestras", "leidos", "escritos")
+
+    def __init__(self, tamano_muestra: int) -> None:
+        self.llamadas = 0
+        self.errores = 0
+        self.total_ns = 0
+        # Ventana de las últimas latencias para calcular percentiles
+        self.muestras = deque(maxlen=tamano_muestra)
+        self.leidos = 0
+        self.escritos = 0
+
+
+def _serie(nombre: str) -> _Serie:
+    serie = _series.get(nombre)
+    if serie is None:
+        serie = _series.setdefault(nombre, _Serie(Metricas.tamano_muestra))
+    return serie
+
+
+def _enlazar(activo: bool) -> None:
+    """Pone en cada clase la envoltura o la función original de los métodos
+    instrumentados, así desactivado no queda ningún costo por llamada
+    """
+    for funcion, envoltura in _instrumentadas:
+        modulo = sys.modules.get(funcion.__module__)
+        clase, _, atributo = funcion.__qualname__.rpartition(".")
+        destino = getattr(modulo, clase, None) if clase else modulo
+        if destino is None:
+            continue
+        elegida = envoltura if activo else funcion
+        setattr(destino, atributo, staticmethod(elegida) if clase else elegida)
+
+
+def _registrar(nombre: str, duracion_ns: int, error: bool) -> None:
+    with _candado:
+        serie = _serie(nombre)
+        serie.llamadas += 1
+        serie.errores += error
+        serie.total_ns += duracion_ns
+        serie.muestras.append(duracion_ns)
+
+
+class _Fase:
+    """Context manager que mide una fase interna de un método"""
+
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre: str) -> None:
+        self.nombre = nombre
+
+    def __enter__(self) -> "_Fase":
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        _registrar(self.nombre, time.perf_counter_ns() - self.inicio, tipo is not None)
+
+
+class Metricas:
+    """Una clase que contiene métodos para medir llamadas, latencias y bytes leídos o
+    escritos de los métodos públicos del utils y de sus fases internas. Mientras está
+    desactivada los métodos públicos no tienen ningún costo adicional y las fases
+    internas solo revisan una bandera
+    """
+
+    # Cantidad de latencias recientes que se guardan por serie para los percentiles
+    tamano_muestra = 1024
+
+    @staticmethod
+    def activar(activo: bool = True) -> None:
+        """Activa o desactiva el registro de métricas
+
+        Args:
+            activo (bool): Nuevo estado
+        """
+        global _activo
+        with _candado:
+            _activo = activo
+            _enlazar(activo)
+
+    @staticmethod
+    def esta_activo() -> bool:
+        """Indica si se están registrando métricas
+
+        Returns:
+            bool: Estado actual
+        """
+        return _activo
+
+    @staticmethod
+    def reiniciar() -> None:
+        """Borra todas las métricas acumuladas"""
+        with _candado:
+            _series.clear()
+
+    @staticmethod
+    def instrumentar(nombre: str) -> Callable[[Callable], Callable]:
+        """Decorador para métodos estáticos que devuelven una tupla (resultado, mensaje
+        de error). Se cuenta como error si el mensaje no es None. Mientras las métricas
+        están desactivadas la clase conserva la función original
+
+        Args:
+            nombre (str): Nombre de la serie, por ejemplo 'archivo.crear_csv'
+
+        Returns:
+            Callable[[Callable], Callable]: Decorador
+        """
+
+        def decorador(funcion: Callable) -> Callable:
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                inicio = time.perf_counter_ns()
+                error = True
+                try:
+                    resultado = funcion(*args, **kwargs)
+                    error = isinstance(resultado, tuple) and resultado[-1] is not None
+                    return resultado
+                finally:
+                    _registrar(nombre, time.perf_counter_ns() - inicio, error)
+
+            _instrumentadas.append((funcion, envoltura))
+            return envoltura if _activo else funcion
+
+        return decorador
+
+    @staticmethod
+    def fase(nombre: str) -> contextlib.AbstractContextManager:
+        """Context manager que mide una fase interna, por ejemplo la validación o la
+        escritura en disco de un método
+
+        Args:
+            nombre (str): Nombre de la serie, por ejemplo 'archivo.crear_csv.disco'
+
+        Returns:
+            contextlib.AbstractContextManager: Medidor de la fase
+        """
+        if not _activo:
+            return _NULO
+        return _Fase(nombre)
+
+    @staticmethod
+    def sumar_bytes(nombre: str, leidos: int = 0, escritos: int = 0) -> None:
+        """Suma bytes leídos o escritos a una serie. Si calcular los bytes tiene costo,
+        el llamador debe revisar antes `Metricas.esta_activo()`
+
+        Args:
+            nombre (str): Nombre de la serie
+            leidos (int): Bytes leídos
+            escritos (int): Bytes escritos
+        """
+        if not _activo:
+            return
+        with _candado:
+            serie = _serie(nombre)
+            serie.leidos += leidos
+            serie.escritos += escritos
+
+    @staticmethod
+    def resumen() -> dict[str, dict[str, Any]]:
+        """Devuelve las métricas acumuladas por serie, con latencias en segundos
+
+        Returns:
+            dict[str, dict[str, Any]]: Métricas por nombre de serie
+        """
+        with _candado:
+            copia = {
+                nombre: (
+                    s.llamadas,
+                    s.errores,
+                    s.total_ns,
+                    sorted(s.muestras),
+                    s.leidos,
+                    s.escritos,
+                )
+                for nombre, s in _series.items()
+            }
+        resumen = {}
+        for nombre, (llamadas, errores, total_ns, muestras, leidos, escritos) in sorted(
+            copia.items()
+        ):
+            cuantiles = {}
+            for q in _CUANTILES:
+                if muestras:
+                    indice = min(len(muestras) - 1, int(q * len(muestras)))
+                    cuantiles[q] = muestras[indice] / 1e9
+            resumen[nombre] = {
+                "llamadas": llamadas,
+                "errores": errores,
+                "total_s": total_ns / 1e9,
+                "cuantiles_s": cuantiles,
+                "bytes_leidos": leidos,
+                "bytes_escritos": escritos,
+            }
+        return resumen
+
+    @staticmethod
+    def exportar_prometheus(
+        ruta_archivo: str, credenciales: dict = {}
+    ) -> tuple[str, str]:
+        """Escribe las métricas en formato de texto de Prometheus, por ejemplo para el
+        textfile collector de node_exporter. El archivo se reemplaza de forma atómica
+
+        Args:
+            ruta_archivo (str): Ruta del archivo .prom, debe ser absoluta
+            credenciales (dict): Datos a registrar en el log
+
+        Returns:
+            tuple[str, str]: Ruta del archivo y mensaje de error
+        """
+        # Se importa aquí porque validaciones.py importa este módulo
+        from .validaciones import Validaciones
+
+        # Validar que 'ruta_archivo' sea del tipo prom
+        res, msj = Validaciones.es_tipo_archivo(ruta_archivo, ".prom", credenciales)
+        if not res:
+            return None, msj
+        # Validar que la carpeta donde estará 'ruta_archivo' exista
+        res, msj = Validaciones.existe_carpeta(
+            os.path.dirname(ruta_archivo), credenciales
+        )
+        if not res:
+            return None, msj
+        resumen = Metricas.resumen()
+        lineas = []
+        metricas_contador = [
+            ("utils_llamadas_total", "llamadas", "Llamadas por método o fase"),
+            ("utils_errores_total", "errores", "Llamadas que devolvieron error"),
+            ("utils_bytes_leidos_total", "bytes_leidos", "Bytes leídos"),
+            ("utils_bytes_escritos_total", "bytes_escritos", "Bytes escritos"),
+        ]
+        for metrica, clave, ayuda in metricas_contador:
+            lineas.append(f"# HELP {metrica} {ayuda}")
+            lineas.append(f"# TYPE {metrica} counter")
+            for nombre, datos in resumen.items():
+                lineas.append(f'{metrica}{{nombre="{nombre}"}} {datos[clave]}')
+        metrica = "utils_latencia_segundos"
+        lineas.append(f"# HELP {metrica} Latencia de las llamadas recientes")
+        lineas.append(f"# TYPE {metrica} summary")
+        for nombre, datos in resumen.items():
+            for q, valor in datos["cuantiles_s"].items():
+                lineas.append(f'{metrica}{{nombre="{nombre}",quantile="{q}"}} {valor}')
+            lineas.append(f'{metrica}_sum{{nombre="{nombre}"}} {datos["total_s"]}')
+            lineas.append(f'{metrica}_count{{nombre="{nombre}"}} {datos["llamadas"]}')
+        # Intenta escribir el archivo en un temporal y luego reemplazarlo
+        ruta_tmp = f"{ruta_archivo}.{os.getpid()}.tmp"
+        try:
+            with open(ruta_tmp, "w", encoding="utf-8") as f:
+                f.write("\n".join(lineas) + "\n")
+            os.replace(ruta_tmp, ruta_archivo)
+            return ruta_archivo, None
+        except Exception as e:
+            mensaje = f"Error al escribir en {ruta_archivo}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+            return None, "Error metricas"
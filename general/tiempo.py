@@ -1,11 +1,9 @@
 import logging
 from datetime import datetime
 
-from .log import setup_logging
+from .metricas import Metricas
 from .validaciones import Validaciones
 
-# Configura el logging
-setup_logging()
 # Obtiene un logger para este módulo
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
@@ -16,6 +14,8 @@ class Tiempo:
     entre otras
     """
 
+    @staticmethod
+    @Metricas.instrumentar("tiempo.marca_a_ms")
     def marca_a_ms(marca_tiempo: str, credenciales: dict = {}) -> tuple[int, str]:
         """Convierte una cadena de tiempo de formato hh:mm:ss.sss a milisegundos
 
@@ -52,6 +52,7 @@ class Tiempo:
             return None, "Error tiempo"
 
     @staticmethod
+    @Metricas.instrumentar("tiempo.calcular_intervalo")
     def calcular_intervalo(
         inicio: str, fin: str, frmt_tiempo: str = "%H:%M:%S.%f", credenciales: dict = {}
     ) -> tuple[float, str]:
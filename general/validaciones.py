@@ -4,10 +4,9 @@ import re
 from collections.abc import Iterable
 from typing import Any
 
-from .log import setup_logging
+from .compresion import EXTENSIONES
+from .metricas import Metricas
 
-# Configura el logging
-setup_logging()
 # Obtiene un logger para este módulo
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
@@ -19,6 +18,7 @@ class Validaciones:
     """
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_tipo")
     def es_tipo(
         var: Any, tipo_esperado: type, credenciales: dict = {}
     ) -> tuple[bool, str]:
@@ -45,6 +45,7 @@ class Validaciones:
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_tipos")
     def es_tipos(
         var: Any, tipos_esperados: Iterable[type], credenciales: dict = {}
     ) -> tuple[bool, str]:
@@ -73,6 +74,7 @@ class Validaciones:
         return False, "Error validaciones"
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_len_correcto")
     def es_len_correcto(
         var: Iterable[Any], len_esperado: int, credenciales: dict = {}
     ) -> tuple[bool, str]:
@@ -102,6 +104,7 @@ class Validaciones:
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_formato_expediente")
     def es_formato_expediente(
         num_expediente: str, credenciales: dict = {}
     ) -> tuple[bool, str]:
@@ -127,6 +130,7 @@ class Validaciones:
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_ruta_absoluta")
     def es_ruta_absoluta(ruta: str, credenciales: dict = {}) -> tuple[bool, str]:
         """Valida si la ruta es de tipo absoluta
 
@@ -149,15 +153,21 @@ class Validaciones:
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_tipo_archivo")
     def es_tipo_archivo(
-        ruta_archivo: str, tipo_esperado: str, credenciales: dict = {}
+        ruta_archivo: str,
+        tipo_esperado: str,
+        credenciales: dict = {},
+        comprimido: bool = False,
     ) -> tuple[bool, str]:
-        """Valida si la ruta del archivo es del tipo esperado
+        """Valida si la ruta del archivo es del tipo esperado. El tipo puede tener
+        extensión compuesta, por ejemplo '.csv.gz'
 
         Args:
             ruta_archivo (str): Variable a validar
             tipo_esperado (str): Tipo de archivo que se espera
             credenciales (dict): Datos a registrar en el log
+            comprimido (bool): Aceptar también el tipo seguido de .gz, .bz2 o .xz
 
         Returns:
             tuple[bool, str]: Es o no el tipo de archivo esperado y mensaje de error
@@ -171,15 +181,22 @@ class Validaciones:
         if not res:
             return False, msj
         # Validar que 'ruta archivo' sea del 'tipo_esperado'
-        if not ruta_archivo.endswith(tipo_esperado):
+        tipos = [tipo_esperado]
+        if comprimido:
+            tipos += [f"{tipo_esperado}{extension}" for extension in EXTENSIONES]
+        if not ruta_archivo.endswith(tuple(tipos)):
             mensaje = f"El archivo no es {tipo_esperado}: {ruta_archivo}"
             logger.error(mensaje)
             return False, "Error validaciones"
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.es_tipos_archivos")
     def es_tipos_archivos(
-        ruta_archivo: str, tipos_esperados: Iterable[str], credenciales: dict = {}
+        ruta_archivo: str,
+        tipos_esperados: Iterable[str],
+        credenciales: dict = {},
+        comprimido: bool = False,
     ) -> tuple[bool, str]:
         """Valida si la ruta del archivo es de alguno de los tipos esperados
 
@@ -187,6 +204,7 @@ class Validaciones:
             ruta_archivo (str): Variable a validar
             tipos_esperados (Iterable[str]): Tipos de archivos que se espera
             credenciales (dict): Datos a registrar en el log
+            comprimido (bool): Aceptar también cada tipo seguido de .gz, .bz2 o .xz
 
         Returns:
             tuple[bool, str]: Es o no de alguno de los tipos de archivos esperados y
@@ -202,7 +220,9 @@ class Validaciones:
             return False, msj
         # Validar que 'ruta_archivo' sea de alguno de los 'tipos_esperados'
         for tp_espera in tipos_esperados:
-            res, _ = Validaciones.es_tipo_archivo(ruta_archivo, tp_espera, credenciales)
+            res, _ = Validaciones.es_tipo_archivo(
+                ruta_archivo, tp_espera, credenciales, comprimido
+            )
             if res:
                 return True, None
         mensaje = f"El archivo no es ninguno de {tipos_esperados}: {ruta_archivo}"
@@ -210,6 +230,7 @@ class Validaciones:
         return False, "Error validaciones"
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.existe_ruta")
     def existe_ruta(ruta: str, credenciales: dict = {}) -> tuple[bool, str]:
         """Valida si la ruta existe
 
@@ -232,6 +253,7 @@ class Validaciones:
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.existe_archivo")
     def existe_archivo(ruta_archivo: str, credenciales: dict = {}) -> tuple[bool, str]:
         """Valida si la ruta del archivo existe y es un archivo
 
@@ -258,6 +280,7 @@ class Validaciones:
         return True, None
 
     @staticmethod
+    @Metricas.instrumentar("validaciones.existe_carpeta")
     def existe_carpeta(ruta_carpeta: str, credenciales: dict = {}) -> tuple[bool, str]:
         """Valida si la ruta de la carpeta existe y es una carpeta
 
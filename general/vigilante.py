@@ -0,0 +1,453 @@
+import functools
+import logging
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+from collections.abc import AsyncIterator, Iterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import ctypes
+
+# Obtiene un logger para este módulo
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Cambio en un archivo de la carpeta vigilada
+Evento = namedtuple("Evento", ["tipo", "ruta"])
+CREADO, MODIFICADO, BORRADO = "creado", "modificado", "borrado"
+# Marca el fin de los eventos en la cola
+_FIN = object()
+
+# Constantes de <sys/inotify.h>
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x1000000
+_IN_ISDIR = 0x40000000
+_MASCARA = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+# wd, máscara, cookie y largo del nombre de cada evento
+_CABECERA = struct.Struct("iIII")
+# Las carpetas modificadas hace menos de esto se vuelven a listar al sondear aunque
+# su mtime no cambie, porque el mtime puede no distinguir dos cambios muy seguidos
+_MARGEN_MTIME_NS = 2 * 10**9
+
+
+@functools.lru_cache(maxsize=None)
+def _libc() -> "ctypes.CDLL":
+    """Devuelve la libc si tiene inotify, o None fuera de Linux. Se carga con el
+    primer vigilante que usa inotify y no al importar el módulo, porque buscarla
+    lanza ldconfig
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    import ctypes
+    import ctypes.util
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _error_libc(operacion: str, ruta: str = None) -> OSError:
+    import ctypes
+
+    numero = ctypes.get_errno()
+    return OSError(numero, f"{operacion}: {os.strerror(numero)}", ruta)
+
+
+class _Inotify:
+    """Descriptor de inotify con las carpetas que vigila"""
+
+    def __init__(self) -> None:
+        self.fd = _libc().inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise _error_libc("inotify_init1")
+        # wd -> ruta de la carpeta
+        self.carpetas: dict[int, str] = {}
+
+    def agregar(self, ruta: str) -> None:
+        wd = _libc().inotify_add_watch(self.fd, os.fsencode(ruta), _MASCARA)
+        if wd < 0:
+            raise _error_libc("inotify_add_watch", ruta)
+        self.carpetas[wd] = ruta
+
+    def leer(self) -> list[tuple[str, int, str]]:
+        """Lee los eventos disponibles sin bloquear, como (carpeta, máscara, nombre)"""
+        eventos = []
+        while True:
+            try:
+                datos = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return eventos
+            i = 0
+            while i < len(datos):
+                wd, mascara, _, largo = _CABECERA.unpack_from(datos, i)
+                i += _CABECERA.size
+                nombre = os.fsdecode(datos[i : i + largo].rstrip(b"\0"))
+                i += largo
+                carpeta = self.carpetas.get(wd)
+                if mascara & _IN_IGNORED:
+                    # La carpeta se borró o se dejó de vigilar
+                    self.carpetas.pop(wd, None)
+                    continue
+                eventos.append((carpeta, mascara, nombre))
+
+    def cerrar(self) -> None:
+        os.close(self.fd)
+
+
+def _firma(stat: os.stat_result) -> tuple[int, int, int]:
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class Vigilante:
+    """Vigila una carpeta y entrega los archivos creados, modificados y borrados como
+    Evento(tipo, ruta), con tipo 'creado', 'modificado' o 'borrado'. En Linux usa
+    inotify y en otros sistemas, o si inotify no está disponible, compara fotos de
+    la carpeta cada 'intervalo' segundos. Los eventos de un mismo archivo se juntan
+    y se entregan cuando pasan 'espera' segundos sin cambios, así un archivo escrito
+    en varias partes llega como un solo evento. Los archivos que ya existían al
+    empezar no se informan
+
+    Se recorre con for o con async for, y se cierra con cerrar() o usándolo como
+    context manager
+    """
+
+    def __init__(
+        self,
+        ruta_carpeta: str,
+        tipos_esperados: list[str] = None,
+        recursivo: bool = True,
+        espera: float = 0.5,
+        intervalo: float = 2.0,
+        sondeo: bool = False,
+    ) -> None:
+        """Toma la foto inicial de la carpeta y empieza a vigilarla en un hilo
+
+        Args:
+            ruta_carpeta (str): Carpeta a vigilar
+            tipos_esperados (list[str]): Extensiones a informar, por ejemplo ['.csv'],
+                o una sola como str; None para todas
+            recursivo (bool): Vigilar también las subcarpetas
+            espera (float): Segundos sin cambios antes de entregar un evento
+            intervalo (float): Segundos entre fotos cuando no hay inotify
+            sondeo (bool): Comparar fotos aunque haya inotify, por ejemplo en
+                carpetas de red donde inotify no ve los cambios de otros equipos
+        """
+        self.ruta = os.path.abspath(ruta_carpeta)
+        # Una sola extensión como str no se separa en caracteres
+        if isinstance(tipos_esperados, str):
+            tipos_esperados = [tipos_esperados]
+        self.tipos = tuple(tipos_esperados) if tipos_esperados else None
+        self.recursivo = recursivo
+        self.espera = espera
+        self.intervalo = intervalo
+        # Archivos conocidos -> firma, y listados de carpetas para el sondeo
+        self._estado: dict[str, tuple[int, int, int]] = {}
+        self._listados: dict[str, tuple[int, list[str], list[str]]] = {}
+        # Eventos que esperan 'espera' segundos sin cambios: ruta -> (tipo, instante)
+        self._pendientes: dict[str, tuple[str, float]] = {}
+        self._eventos: queue.Queue = queue.Queue()
+        self._cerrado = threading.Event()
+        self._inotify: _Inotify = None
+        self._despertar: tuple[int, int] = None
+        if not sondeo and _libc() is not None:
+            try:
+                self._inotify = _Inotify()
+                self._estado = self._agregar_arbol(self.ruta)
+                self._despertar = os.pipe()
+            except OSError as e:
+                mensaje = f"Sin inotify en {self.ruta}, se usa sondeo: {e}"
+                logger.warning(mensaje)
+                self._cerrar_inotify()
+        if self._inotify is None:
+            self._estado = self._sondear()
+        self._hilo = threading.Thread(
+            target=self._ciclo, name="utils-vigilante", daemon=True
+        )
+        self._hilo.start()
+
+    @property
+    def modo(self) -> str:
+        """'inotify' o 'sondeo'"""
+        return "sondeo" if self._inotify is None else "inotify"
+
+    def _acepta(self, nombre: str) -> bool:
+        return self.tipos is None or nombre.endswith(self.tipos)
+
+    def _anotar(self, tipo: str, ruta: str) -> None:
+        """Junta el evento con el pendiente del mismo archivo y reinicia su espera"""
+        previo = self._pendientes.pop(ruta, (None,))[0]
+        if previo == CREADO:
+            # Creado y borrado antes de entregarlo: no hay nada que informar
+            if tipo == BORRADO:
+                return
+            tipo = CREADO
+        elif previo == BORRADO and tipo != BORRADO:
+            tipo = MODIFICADO
+        self._pendientes[ruta] = (tipo, time.monotonic())
+
+    def _entregar(self) -> float:
+        """Pasa a la cola los eventos que cumplieron su espera
+
+        Returns:
+            float: Segundos hasta que venza el siguiente, o None si no hay
+        """
+        ahora, siguiente = time.monotonic(), None
+        for ruta, (tipo, instante) in sorted(
+            self._pendientes.items(), key=lambda item: item[1][1]
+        ):
+            restante = instante + self.espera - ahora
+            if restante > 0:
+                siguiente = restante if siguiente is None else min(siguiente, restante)
+                continue
+            del self._pendientes[ruta]
+            self._eventos.put(Evento(tipo, ruta))
+        return siguiente
+
+    def _agregar_arbol(self, ruta: str, anunciar: bool = False) -> dict:
+        """Vigila con inotify la carpeta y, si es recursivo, sus subcarpetas, y anota
+        los archivos que encuentra. Con 'anunciar' los informa como creados
+        """
+        encontrados, carpetas = {}, [ruta]
+        while carpetas:
+            carpeta = carpetas.pop()
+            try:
+                self._inotify.agregar(carpeta)
+                entradas = list(os.scandir(carpeta))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if self.recursivo:
+                            carpetas.append(entrada.path)
+                    elif self._acepta(entrada.name):
+                        encontrados[entrada.path] = _firma(entrada.stat())
+                except FileNotFoundError:
+                    continue
+        for archivo, firma in encontrados.items():
+            if anunciar and archivo not in self._estado:
+                self._anotar(CREADO, archivo)
+            self._estado[archivo] = firma
+        return encontrados
+
+    def _sondear(self) -> dict[str, tuple[int, int, int]]:
+        """Toma una foto de los archivos con su firma. Las carpetas cuyo mtime no
+        cambió no se vuelven a listar; solo se consultan sus archivos
+        """
+        foto, listados, carpetas = {}, {}, [self.ruta]
+        limite = time.time_ns() - _MARGEN_MTIME_NS
+        while carpetas:
+            carpeta = carpetas.pop()
+            try:
+                mtime = os.stat(carpeta).st_mtime_ns
+                listado = self._listados.get(carpeta)
+                if listado is None or listado[0] != mtime or mtime > limite:
+                    archivos, subcarpetas = [], []
+                    with os.scandir(carpeta) as entradas:
+                        for entrada in entradas:
+                            if entrada.is_dir(follow_symlinks=False):
+                                subcarpetas.append(entrada.path)
+                            elif self._acepta(entrada.name):
+                                archivos.append(entrada.path)
+                    listado = (mtime, archivos, subcarpetas)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            listados[carpeta] = listado
+            for archivo in listado[1]:
+                try:
+                    foto[archivo] = _firma(os.stat(archivo))
+                except FileNotFoundError:
+                    continue
+            if self.recursivo:
+                carpetas.extend(listado[2])
+        self._listados = listados
+        return foto
+
+    def _comparar(self, foto: dict[str, tuple[int, int, int]]) -> None:
+        """Anota las diferencias entre la foto y los archivos conocidos"""
+        for archivo, firma in foto.items():
+            previa = self._estado.get(archivo)
+            if previa is None:
+                self._anotar(CREADO, archivo)
+            elif previa != firma:
+                self._anotar(MODIFICADO, archivo)
+        for archivo in self._estado.keys() - foto.keys():
+            self._anotar(BORRADO, archivo)
+        self._estado = foto
+
+    def _procesar(self, eventos: list[tuple[str, int, str]]) -> None:
+        """Traduce los eventos de inotify a eventos por archivo"""
+        for carpeta, mascara, nombre in eventos:
+            if mascara & _IN_Q_OVERFLOW:
+                # Se perdieron eventos: se compara una foto completa y se vuelven a
+                # vigilar todas las carpetas
+                mensaje = f"Cola de inotify llena, se relee {self.ruta}"
+                logger.warning(mensaje)
+                self._listados = {}
+                self._comparar(self._sondear())
+                for carpeta_vigilada in self._listados:
+                    try:
+                        self._inotify.agregar(carpeta_vigilada)
+                    except (FileNotFoundError, NotADirectoryError):
+                        continue
+                continue
+            if carpeta is None or not nombre:
+                if mascara & (_IN_DELETE_SELF | _IN_MOVE_SELF) and carpeta == self.ruta:
+                    mensaje = f"La carpeta vigilada ya no existe: {self.ruta}"
+                    logger.warning(mensaje)
+                continue
+            ruta = os.path.join(carpeta, nombre)
+            if mascara & _IN_ISDIR:
+                if mascara & (_IN_CREATE | _IN_MOVED_TO) and self.recursivo:
+                    self._agregar_arbol(ruta, anunciar=True)
+                elif mascara & (_IN_DELETE | _IN_MOVED_FROM):
+                    prefijo = ruta + os.sep
+                    for archivo in [a for a in self._estado if a.startswith(prefijo)]:
+                        del self._estado[archivo]
+                        self._anotar(BORRADO, archivo)
+                continue
+            if not self._acepta(nombre):
+                continue
+            if mascara & (_IN_DELETE | _IN_MOVED_FROM):
+                if self._estado.pop(ruta, None) is not None:
+                    self._anotar(BORRADO, ruta)
+                continue
+            try:
+                firma = _firma(os.stat(ruta))
+            except FileNotFoundError:
+                # Ya se borró; el evento de borrado llega después
+                continue
+            tipo = MODIFICADO if ruta in self._estado else CREADO
+            self._estado[ruta] = firma
+            self._anotar(tipo, ruta)
+
+    def _pasar_a_sondeo(self, error: OSError) -> None:
+        """Deja inotify, por ejemplo al llegar al límite de carpetas vigiladas del
+        sistema, y sigue comparando fotos
+        """
+        mensaje = f"Se deja inotify en {self.ruta}, se usa sondeo: {error}"
+        logger.warning(mensaje)
+        self._inotify.cerrar()
+        self._inotify = None
+        self._listados = {}
+        self._comparar(self._sondear())
+
+    def _ciclo(self) -> None:
+        try:
+            siguiente_foto = time.monotonic() + self.intervalo
+            while not self._cerrado.is_set():
+                plazo = self._entregar()
+                if self._inotify is not None:
+                    listos, _, _ = select.select(
+                        [self._inotify.fd, self._despertar[0]], [], [], plazo
+                    )
+                    if self._inotify.fd in listos:
+                        try:
+                            self._procesar(self._inotify.leer())
+                        except OSError as e:
+                            self._pasar_a_sondeo(e)
+                    continue
+                espera = siguiente_foto - time.monotonic()
+                if plazo is not None:
+                    espera = min(espera, plazo)
+                if self._cerrado.wait(max(espera, 0)):
+                    break
+                if time.monotonic() >= siguiente_foto:
+                    self._comparar(self._sondear())
+                    siguiente_foto = time.monotonic() + self.intervalo
+        except Exception as e:
+            mensaje = f"Se dejó de vigilar {self.ruta}, problema imprevisto: {e}"
+            logger.exception(mensaje)
+        finally:
+            self._eventos.put(_FIN)
+
+    def _siguiente(self, tiempo: float = None) -> Evento:
+        """Espera el siguiente evento. Devuelve _FIN al cerrarse y None si vence el
+        tiempo
+        """
+        try:
+            evento = self._eventos.get(timeout=tiempo)
+        except queue.Empty:
+            return None
+        if evento is _FIN:
+            # Se deja de nuevo para que también terminen los otros consumidores
+            self._eventos.put(_FIN)
+        return evento
+
+    def __iter__(self) -> Iterator[Evento]:
+        while (evento := self._siguiente()) is not _FIN:
+            yield evento
+
+    async def __aiter__(self) -> AsyncIterator[Evento]:
+        # asyncio se importa recién aquí para no cargarlo al importar el paquete
+        import asyncio
+
+        # La espera corre en un hilo aparte con un tiempo máximo, para que cancelar
+        # la tarea no deje un hilo bloqueado en la cola
+        while True:
+            evento = await asyncio.to_thread(self._siguiente, 0.5)
+            if evento is _FIN:
+                return
+            if evento is not None:
+                yield evento
+
+    def _cerrar_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.cerrar()
+            self._inotify = None
+        if self._despertar is not None:
+            for fd in self._despertar:
+                os.close(fd)
+            self._despertar = None
+
+    def cerrar(self) -> None:
+        """Deja de vigilar. Los eventos que todavía esperaban se descartan y los
+        iteradores terminan después de entregar los que ya estaban en la cola
+        """
+        if self._cerrado.is_set():
+            return
+        self._cerrado.set()
+        if self._despertar is not None:
+            os.write(self._despertar[1], b"\0")
+        if self._hilo is not threading.current_thread():
+            self._hilo.join()
+        self._cerrar_inotify()
+
+    def __enter__(self) -> "Vigilante":
+        return self
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        self.cerrar()